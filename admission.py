@@ -0,0 +1,228 @@
+"""
+Join admission control for the LiveKit Streaming Platform
+"""
+import asyncio
+import collections
+import math
+import time
+from typing import Deque, Dict, Optional, Tuple
+
+
+class AdmissionRejected(Exception):
+    """A join was turned away: its room's queue was full or it waited too long"""
+
+    def __init__(self, retry_after: float, reason: str = "Too many joins, try again later"):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``burst``; a rate of 0 never limits"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds until a token is available"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now if now is not None else time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def available(self, now: Optional[float] = None) -> float:
+        """Whole tokens that can be taken right away"""
+        if self.rate <= 0:
+            return math.inf
+        self._refill(now if now is not None else time.monotonic())
+        return max(0, math.floor(self.tokens))
+
+    def take(self, count: int = 1):
+        if self.rate > 0:
+            self.tokens -= count
+
+    def idle(self, now: float) -> bool:
+        """Whether the bucket has refilled completely, so forgetting it changes nothing"""
+        return self.rate <= 0 or self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class RoomQueue:
+    """Joins waiting for one room, hosts ahead of everyone else"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.hosts: Deque[asyncio.Future] = collections.deque()
+        self.viewers: Deque[asyncio.Future] = collections.deque()
+        self.drainer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.hosts) + len(self.viewers)
+
+    def pop(self) -> Optional[asyncio.Future]:
+        for lane in (self.hosts, self.viewers):
+            while lane:
+                waiter = lane.popleft()
+                # Callers that gave up or disconnected do not use up a token
+                if not waiter.done():
+                    return waiter
+        return None
+
+
+class JoinAdmission:
+    """Rate limits joins per room and overall, queueing the excess in FIFO order.
+
+    A join goes straight through when both its room's bucket and the global
+    bucket have a token and nobody is waiting ahead of it. Otherwise it waits
+    in its room's queue, which is drained at the bucket rates, hosts first.
+    Hosts line up in a lane of their own, bounded by ``host_queue_size``, so
+    a viewer storm cannot lock them out but claiming to be a host does not
+    lift the limit either. When its lane is full or the wait exceeds
+    ``max_wait``, the join is rejected with an estimate of when to retry.
+    """
+
+    def __init__(self, global_rate: float = 200.0, global_burst: float = 400.0,
+                 room_rate: float = 50.0, room_burst: float = 100.0,
+                 queue_size: int = 1000, max_wait: float = 10.0, host_queue_size: int = 100):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.room_rate = room_rate
+        self.room_burst = room_burst
+        self.queue_size = queue_size
+        self.host_queue_size = host_queue_size
+        self.max_wait = max_wait
+        self._rooms: Dict[str, RoomQueue] = {}
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._prune_at = 1024
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(room) for room in self._rooms.values())
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "queue_depth": self.queue_depth,
+            "rooms_waiting": sum(1 for room in self._rooms.values() if len(room)),
+            "wait_avg_ms": round(self._wait_total / self._waited * 1000, 3) if self._waited else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 3),
+        }
+
+    def room_depth(self, room_name: str) -> int:
+        room = self._rooms.get(room_name)
+        return len(room) if room else 0
+
+    def _room(self, room_name: str) -> RoomQueue:
+        room = self._rooms.get(room_name)
+        if room is None:
+            if len(self._rooms) >= self._prune_at:
+                self._prune()
+            room = self._rooms[room_name] = RoomQueue(TokenBucket(self.room_rate, self.room_burst))
+        return room
+
+    def _prune(self):
+        now = time.monotonic()
+        for name, room in list(self._rooms.items()):
+            if not len(room) and room.drainer is None and room.bucket.idle(now):
+                del self._rooms[name]
+        self._prune_at = max(1024, 2 * len(self._rooms))
+
+    def _retry_after(self, depth: int) -> float:
+        rates = [rate for rate in (self.room_rate, self.global_bucket.rate) if rate > 0]
+        return (depth + 1) / min(rates) if rates else 1.0
+
+    async def _drain(self, room: RoomQueue):
+        try:
+            while len(room):
+                now = time.monotonic()
+                delay = max(room.bucket.delay(now), self.global_bucket.delay(now))
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                waiter = room.pop()
+                if waiter is None:
+                    break
+                room.bucket.take()
+                self.global_bucket.take()
+                waiter.set_result(None)
+        finally:
+            room.drainer = None
+
+    async def acquire(self, room_name: str, priority: bool = False) -> float:
+        """Wait for a join slot in a room; returns the seconds spent waiting"""
+        room = self._room(room_name)
+        now = time.monotonic()
+        if not len(room) and room.bucket.delay(now) == 0 and self.global_bucket.delay(now) == 0:
+            room.bucket.take()
+            self.global_bucket.take()
+            self.admitted += 1
+            return 0.0
+
+        # Each lane has its own bound, a viewer storm must not lock hosts out
+        depth = len(room.hosts) if priority else len(room)
+        if depth >= (self.host_queue_size if priority else self.queue_size):
+            self.rejected += 1
+            raise AdmissionRejected(self._retry_after(depth))
+
+        waiter = asyncio.get_running_loop().create_future()
+        (room.hosts if priority else room.viewers).append(waiter)
+        self.queued += 1
+        if room.drainer is None:
+            room.drainer = asyncio.create_task(self._drain(room))
+
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self.rejected += 1
+            raise AdmissionRejected(self._retry_after(len(room)))
+
+        waited = time.monotonic() - now
+        self.admitted += 1
+        self._waited += 1
+        self._wait_total += waited
+        if waited > self._wait_max:
+            self._wait_max = waited
+        return waited
+
+    def take_many(self, room_name: str, hosts: int, viewers: int) -> Tuple[int, int]:
+        """Admit up to that many host and viewer joins at once, without waiting.
+
+        Returns how many of each got a token, hosts served first. Viewers do
+        not overtake joins queued for the room, hosts only queued hosts.
+        Raises AdmissionRejected if none got through.
+        """
+        room = self._room(room_name)
+        now = time.monotonic()
+        available = min(room.bucket.available(now), self.global_bucket.available(now))
+        granted_hosts = 0 if room.hosts else int(min(hosts, available))
+        granted_viewers = 0 if len(room) else int(min(viewers, available - granted_hosts))
+        granted = granted_hosts + granted_viewers
+        room.bucket.take(granted)
+        self.global_bucket.take(granted)
+        self.admitted += granted
+        self.rejected += hosts + viewers - granted
+        if not granted and hosts + viewers:
+            raise AdmissionRejected(self._retry_after(len(room)))
+        return granted_hosts, granted_viewers
+
+    async def close(self):
+        for room in self._rooms.values():
+            if room.drainer is not None:
+                room.drainer.cancel()
+        self._rooms.clear()
@@ -0,0 +1,322 @@
+"""
+Load and latency benchmarks for the LiveKit Streaming Platform API
+
+Starts a fake LiveKit RoomService (fake_livekit.py) and the API under
+uvicorn, runs the selected scenarios and prints a JSON report:
+    python benchmark.py --scenario join_storm --scenario list_rooms
+    python benchmark.py --api-env ROOM_CACHE_TTL=1 --output bench_output.txt
+
+Join rate limits are turned off for every scenario but ``admission``, which
+gets its own API process with the default limits, so the other scenarios
+measure the request path rather than the limiter. --api-env overrides both.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import aiohttp
+
+from fake_livekit import FakeRoomService, start_fake_livekit
+
+API_KEY = "bench-key"
+API_SECRET = "bench-secret-bench-secret-bench-secret"
+
+# API environment of the scenarios that are not about admission control
+NO_JOIN_LIMITS = {"JOIN_RATE": "0", "JOIN_ROOM_RATE": "0"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, duration: float, upstream: Dict[str, int]) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 1) if duration > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "upstream_calls": upstream,
+    }
+
+
+async def run_load(request: Callable[[int], Awaitable[bool]], count: int, concurrency: int):
+    """Issue `count` requests with at most `concurrency` in flight"""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < count:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                ok = await request(index)
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+class BenchContext:
+    """Fake LiveKit, the API under test and a shared HTTP session"""
+
+    def __init__(self, args: argparse.Namespace, env: Dict[str, str] = None):
+        self.args = args
+        self.env = env or {}
+        self.fake = FakeRoomService(latency=args.latency_ms / 1000)
+        self.fake_port = free_port()
+        self.api_port = free_port()
+        self.api_url = f"http://127.0.0.1:{self.api_port}"
+        self.session: aiohttp.ClientSession = None
+        self._runner = None
+        self._process: subprocess.Popen = None
+
+    async def __aenter__(self):
+        # Seeded up front so the API's room cache starts out warm
+        self.fake.seed(self.args.rooms, prefix="bench-list-")
+        self._runner = await start_fake_livekit(self.fake, port=self.fake_port)
+
+        env = dict(os.environ)
+        env.update({
+            "LIVEKIT_URL": f"http://127.0.0.1:{self.fake_port}",
+            "LIVEKIT_API_KEY": API_KEY,
+            "LIVEKIT_API_SECRET": API_SECRET,
+        })
+        env.update(self.env)
+        for item in self.args.api_env:
+            key, _, value = item.partition("=")
+            env[key] = value
+
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(self.api_port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+        )
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+        await self._wait_ready()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self._process.terminate()
+        self._process.wait(timeout=10)
+        await self._runner.cleanup()
+
+    async def _wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError("API server exited during startup")
+            try:
+                async with self.session.get(f"{self.api_url}/") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+        raise RuntimeError("API server did not become ready")
+
+    def upstream_calls(self) -> Dict[str, int]:
+        calls = self.fake.calls
+        self.fake.calls = {}
+        return calls
+
+    async def create_room(self, name: str, max_participants: int):
+        async with self.session.post(f"{self.api_url}/rooms/create", json={
+            "name": name, "max_participants": max_participants
+        }) as response:
+            response.raise_for_status()
+
+
+async def join_storm(ctx: BenchContext) -> Dict:
+    """Many viewers requesting join tokens for one room at once"""
+    args = ctx.args
+    await ctx.create_room("bench-join-storm", args.joins + 1)
+    ctx.upstream_calls()
+
+    async def join(index: int) -> bool:
+        async with ctx.session.post(f"{ctx.api_url}/rooms/bench-join-storm/join", json={
+            "participant_name": f"viewer-{index}"
+        }) as response:
+            await response.read()
+            return response.status == 200
+
+    latencies, errors, duration = await run_load(join, args.joins, args.concurrency)
+    return summarize(latencies, errors, duration, ctx.upstream_calls())
+
+
+async def list_rooms(ctx: BenchContext) -> Dict:
+    """Dashboards pulling the full room list"""
+    args = ctx.args
+    ctx.upstream_calls()
+    listed = []
+
+    async def fetch(index: int) -> bool:
+        async with ctx.session.get(f"{ctx.api_url}/rooms") as response:
+            body = await response.json()
+            listed.append(len(body))
+            return response.status == 200
+
+    latencies, errors, duration = await run_load(fetch, args.list_requests, args.concurrency)
+    result = summarize(latencies, errors, duration, ctx.upstream_calls())
+    result["rooms_listed"] = max(listed, default=0)
+    return result
+
+
+async def ws_subscribers(ctx: BenchContext) -> Dict:
+    """Many websocket viewers of one room, measuring change fan-out latency"""
+    args = ctx.args
+    room_name = "bench-ws"
+    await ctx.create_room(room_name, 100000)
+
+    sockets = await asyncio.gather(*(
+        ctx.session.ws_connect(f"{ctx.api_url}/ws/rooms/{room_name}")
+        for _ in range(args.subscribers)
+    ))
+    try:
+        # Every socket first receives the current room state
+        await asyncio.gather(*(ws.receive_json() for ws in sockets))
+        ctx.upstream_calls()
+
+        async def wait_for_change(ws) -> float:
+            while True:
+                message = await ws.receive_json()
+                if message["type"] == "room_update" and message["data"]["num_participants"] > 0:
+                    return time.perf_counter()
+
+        waiters = [asyncio.create_task(wait_for_change(ws)) for ws in sockets]
+        changed_at = time.perf_counter()
+        ctx.fake.add_participant(room_name, "bench-ws-publisher")
+
+        received, pending = await asyncio.wait(waiters, timeout=args.ws_timeout)
+        for task in pending:
+            task.cancel()
+        latencies = [task.result() - changed_at for task in received if not task.exception()]
+        duration = time.perf_counter() - changed_at
+        return summarize(latencies, len(sockets) - len(latencies), duration, ctx.upstream_calls())
+    finally:
+        await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+
+
+async def admission(ctx: BenchContext) -> Dict:
+    """A join storm against the default rate limits, every 50th join a host"""
+    args = ctx.args
+    room_name = "bench-admission"
+    await ctx.create_room(room_name, args.admission_joins + 1)
+    ctx.upstream_calls()
+    statuses: Dict[int, int] = {}
+    host_latencies: List[float] = []
+
+    async def join(index: int) -> bool:
+        is_host = index % 50 == 0
+        start = time.perf_counter()
+        async with ctx.session.post(f"{ctx.api_url}/rooms/{room_name}/join", json={
+            "participant_name": f"admission-{index}", "is_host": is_host
+        }) as response:
+            await response.read()
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        if is_host and response.status == 200:
+            host_latencies.append(time.perf_counter() - start)
+        return response.status == 200
+
+    latencies, errors, duration = await run_load(join, args.admission_joins, args.admission_concurrency)
+    result = summarize(latencies, errors, duration, ctx.upstream_calls())
+    host_latencies.sort()
+    result["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    result["host_latency_ms"] = {
+        "p50": round(percentile(host_latencies, 50) * 1000, 2),
+        "p99": round(percentile(host_latencies, 99) * 1000, 2),
+    }
+    async with ctx.session.get(f"{ctx.api_url}/admission") as response:
+        result["admission"] = await response.json()
+    return result
+
+
+# Scenario and the API environment it runs against
+SCENARIOS = {
+    "join_storm": (join_storm, NO_JOIN_LIMITS),
+    "list_rooms": (list_rooms, NO_JOIN_LIMITS),
+    "ws_subscribers": (ws_subscribers, NO_JOIN_LIMITS),
+    "admission": (admission, {}),
+}
+
+
+async def main(args: argparse.Namespace):
+    # A thousand sockets on each side needs more than the default fd limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    report = {"config": {k: v for k, v in vars(args).items() if k != "output"}, "scenarios": {}}
+    names = args.scenario or list(SCENARIOS)
+    # One API process per distinct environment, in the order first needed
+    envs = []
+    for name in names:
+        if SCENARIOS[name][1] not in envs:
+            envs.append(SCENARIOS[name][1])
+    for env in envs:
+        async with BenchContext(args, env) as ctx:
+            for name in names:
+                scenario, scenario_env = SCENARIOS[name]
+                if scenario_env == env:
+                    print(f"⏱️ Running {name}...", file=sys.stderr)
+                    report["scenarios"][name] = await scenario(ctx)
+    report["scenarios"] = {name: report["scenarios"][name] for name in names}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the streaming platform API")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="scenario to run, repeatable (default: all)")
+    parser.add_argument("--concurrency", type=int, default=100, help="in-flight HTTP requests")
+    parser.add_argument("--joins", type=int, default=5000, help="join requests in join_storm")
+    parser.add_argument("--rooms", type=int, default=10000, help="rooms seeded for list_rooms")
+    parser.add_argument("--list-requests", type=int, default=200, help="GET /rooms calls in list_rooms")
+    parser.add_argument("--subscribers", type=int, default=1000, help="websockets in ws_subscribers")
+    parser.add_argument("--ws-timeout", type=float, default=30.0, help="seconds to wait for fan-out")
+    parser.add_argument("--admission-joins", type=int, default=2000,
+                        help="join requests in admission")
+    parser.add_argument("--admission-concurrency", type=int, default=2000,
+                        help="in-flight joins in admission, enough to overflow the default queue")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="fake LiveKit latency per RPC")
+    parser.add_argument("--api-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the API process, repeatable")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
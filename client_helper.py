@@ -3,55 +3,138 @@ Client helper utilities for the LiveKit Streaming Platform
 """
 import asyncio
 import json
-from typing import Dict, Optional, Callable
+from typing import Dict, List, Optional, Callable
 from datetime import datetime
 
+import aiohttp
 from livekit import rtc
 
+from data_channel import DataPublisher, decode_packet
+from media import AudioInput, AudioPump, FrameSource, VideoFeeder
+from track_pipeline import FrameProcessor, TrackPipeline
+
 class StreamingClient:
-    """Simplified client for connecting to streaming rooms"""
+    """Simplified client for connecting to streaming rooms.
+
+    All API calls share one pooled keep-alive HTTP session; use the client as
+    ``async with StreamingClient() as client:`` or call ``close()`` when done.
+    """
     
-    def __init__(self, api_url: str = "http://localhost:8000"):
+    def __init__(self, api_url: str = "http://localhost:8000", max_connections: int = 100,
+                 max_connections_per_host: int = 0, keepalive_timeout: float = 30.0,
+                 timeout: float = 30.0, connect_timeout: float = 10.0):
         self.api_url = api_url
         self.room: Optional[rtc.Room] = None
         self.connected = False
         self.callbacks: Dict[str, Callable] = {}
         
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Set by enable_data_batching(); one publisher per reliability mode
+        self._batching: Optional[Dict] = None
+        self._publishers: Dict[bool, DataPublisher] = {}
+        self._feeders: List = []
+        
+        # Track kind -> pipeline options, and running pipelines by track sid
+        self._processors: Dict[int, Dict] = {}
+        self.pipelines: Dict[str, TrackPipeline] = {}
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.disconnect()
+        await self.close()
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session, created on first use inside the event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+    
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def _request(self, method: str, path: str, **kwargs) -> Dict:
+        async with self.session.request(method, f"{self.api_url}{path}", **kwargs) as response:
+            return await response.json()
+        
     def on_event(self, event_name: str, callback: Callable):
         """Register event callbacks"""
         self.callbacks[event_name] = callback
     
     async def create_room(self, name: str, max_participants: int = 100) -> Dict:
         """Create a new streaming room"""
-        import aiohttp
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.api_url}/rooms/create",
-                json={
-                    "name": name,
-                    "max_participants": max_participants,
-                    "audio_enabled": True,
-                    "video_enabled": True
-                }
-            ) as response:
-                return await response.json()
+        return await self._request("POST", "/rooms/create", json={
+            "name": name,
+            "max_participants": max_participants,
+            "audio_enabled": True,
+            "video_enabled": True
+        })
     
     async def join_room(self, room_name: str, participant_name: str, 
                        permissions: Optional[Dict] = None) -> Dict:
         """Join a streaming room"""
-        import aiohttp
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.api_url}/rooms/{room_name}/join",
-                json={
-                    "room_name": room_name,
-                    "participant_name": participant_name,
-                    "permissions": permissions or {}
-                }
-            ) as response:
-                return await response.json()
+        return await self._request("POST", f"/rooms/{room_name}/join", json={
+            "room_name": room_name,
+            "participant_name": participant_name,
+            "permissions": permissions or {}
+        })
+    
+    async def join_many(self, room_name: str, participant_names: List[str], is_host: bool = False,
+                        chunk_size: int = 500, concurrency: int = 4) -> List[Dict]:
+        """Join many participants, batching them through the bulk join endpoint.
+
+        Returns one result per name, in order, each with ``success`` and
+        either ``token`` or ``error``.
+        """
+        chunks = [
+            participant_names[i:i + chunk_size]
+            for i in range(0, len(participant_names), chunk_size)
+        ]
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def join_chunk(names: List[str]) -> List[Dict]:
+            async with semaphore:
+                result = await self._request("POST", f"/rooms/{room_name}/join:bulk", json={
+                    "participants": [
+                        {"participant_name": name, "is_host": is_host} for name in names
+                    ]
+                })
+            if "participants" not in result:
+                error = result.get("detail", "Bulk join failed")
+                return [{"participant_name": name, "success": False, "error": error} for name in names]
+            return result["participants"]
+        
+        results = await asyncio.gather(*(join_chunk(chunk) for chunk in chunks))
+        return [result for chunk_results in results for result in chunk_results]
+    
+    def add_track_processor(self, process: FrameProcessor, kind: int = rtc.TrackKind.KIND_VIDEO,
+                            **options):
+        """Run ``process`` on frames of every subscribed track of a kind.
+
+        Each track gets a TrackPipeline (see its options) that keeps only
+        the latest frames and processes them in an executor.
+        """
+        self._processors[kind] = {"process": process, **options}
+    
+    @property
+    def pipeline_stats(self) -> Dict[str, Dict[str, float]]:
+        """Frame counters of every running track pipeline"""
+        return {sid: pipeline.stats for sid, pipeline in self.pipelines.items()}
     
     async def connect_to_room(self, token: str, url: str, room_name: str):
         """Connect to LiveKit room with token"""
@@ -79,9 +162,32 @@ class StreamingClient:
         @self.room.on("track_subscribed")
         def on_track_subscribed(track: rtc.Track, publication: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
             print(f"Track subscribed: {track.sid}")
+            options = self._processors.get(track.kind)
+            if options is not None and track.sid not in self.pipelines:
+                pipeline = TrackPipeline(track, **options)
+                pipeline.start()
+                self.pipelines[track.sid] = pipeline
             if "track_subscribed" in self.callbacks:
                 self.callbacks["track_subscribed"](track, publication, participant)
         
+        @self.room.on("track_unsubscribed")
+        def on_track_unsubscribed(track: rtc.Track, publication: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
+            pipeline = self.pipelines.pop(track.sid, None)
+            if pipeline is not None:
+                asyncio.create_task(pipeline.stop())
+        
+        @self.room.on("data_received")
+        def on_data_received(packet: rtc.DataPacket):
+            if "data_received" not in self.callbacks:
+                return
+            try:
+                messages = decode_packet(packet.data)
+            except ValueError as e:
+                print(f"Dropping undecodable data packet: {e}")
+                return
+            for message in messages:
+                self.callbacks["data_received"](message, packet.participant, packet.topic)
+        
         # Connect to room
         await self.room.connect(url, token)
         self.connected = True
@@ -89,13 +195,13 @@ class StreamingClient:
         if "connected" in self.callbacks:
             self.callbacks["connected"]()
     
-    async def publish_camera(self):
+    async def publish_camera(self, width: int = 1280, height: int = 720):
         """Publish camera feed"""
         if not self.room:
             raise Exception("Not connected to room")
         
         # Create camera source
-        source = rtc.VideoSource(1280, 720)
+        source = rtc.VideoSource(width, height)
         track = rtc.LocalVideoTrack.create_video_track("camera", source)
         
         # Publish track
@@ -104,13 +210,26 @@ class StreamingClient:
         
         return track, source
     
-    async def publish_microphone(self):
+    async def stream_camera(self, frames: FrameSource, fps: float = 30.0, width: int = 1280,
+                            height: int = 720, buffer_type: int = rtc.VideoBufferType.RGBA,
+                            max_frames: Optional[int] = None) -> VideoFeeder:
+        """Publish a camera track fed from arrays, a raw file or a generator.
+
+        See media.array_frames and media.raw_video_file for ready-made sources.
+        """
+        track, source = await self.publish_camera(width, height)
+        feeder = VideoFeeder(source, width, height, fps, buffer_type)
+        feeder.start(frames, max_frames)
+        self._feeders.append(feeder)
+        return feeder
+    
+    async def publish_microphone(self, sample_rate: int = 48000, num_channels: int = 2):
         """Publish microphone feed"""
         if not self.room:
             raise Exception("Not connected to room")
         
         # Create audio source
-        source = rtc.AudioSource(48000, 2)
+        source = rtc.AudioSource(sample_rate, num_channels)
         track = rtc.LocalAudioTrack.create_audio_track("microphone", source)
         
         # Publish track
@@ -119,11 +238,64 @@ class StreamingClient:
         
         return track, source
     
+    async def stream_microphone(self, samples: AudioInput, input_rate: int,
+                                input_channels: Optional[int] = None, sample_rate: int = 48000,
+                                num_channels: int = 2) -> AudioPump:
+        """Publish a microphone track fed from a WAV file, an array or a generator.
+
+        Input at any rate or channel count is converted to the track format;
+        see media.read_wav for memory-mapped WAV input.
+        """
+        track, source = await self.publish_microphone(sample_rate, num_channels)
+        pump = AudioPump(source)
+        pump.start(samples, input_rate, input_channels)
+        self._feeders.append(pump)
+        return pump
+    
+    def enable_data_batching(self, max_delay: float = 0.02, max_bytes: int = 14000,
+                             queue_size: int = 1000, codec: Optional[int] = None):
+        """Coalesce send_data messages into framed packets.
+
+        Messages are flushed every ``max_delay`` seconds or once a packet
+        reaches ``max_bytes``; ``send_data`` waits while ``queue_size``
+        messages are pending. Receivers must decode with ``decode_packet``,
+        which ``connect_to_room`` does for the ``data_received`` callback.
+        """
+        self._batching = {
+            "max_delay": max_delay,
+            "max_bytes": max_bytes,
+            "queue_size": queue_size,
+            "codec": codec,
+        }
+    
+    def _get_publisher(self, reliable: bool) -> DataPublisher:
+        publisher = self._publishers.get(reliable)
+        if publisher is None:
+            async def publish(packet: bytes):
+                await self.room.local_participant.publish_data(packet, reliable=reliable)
+            
+            publisher = DataPublisher(publish, **self._batching)
+            publisher.start()
+            self._publishers[reliable] = publisher
+        return publisher
+    
+    @property
+    def data_stats(self) -> Dict[str, Dict[str, int]]:
+        """Counters of the batched data publishers"""
+        return {
+            "reliable" if reliable else "lossy": publisher.stats
+            for reliable, publisher in self._publishers.items()
+        }
+    
     async def send_data(self, data: Dict, reliable: bool = True):
         """Send data to all participants"""
         if not self.room:
             raise Exception("Not connected to room")
         
+        if self._batching is not None:
+            await self._get_publisher(reliable).send(data)
+            return
+        
         message = json.dumps(data)
         await self.room.local_participant.publish_data(
             message.encode(), 
@@ -132,25 +304,33 @@ class StreamingClient:
     
     async def disconnect(self):
         """Disconnect from room"""
+        for feeder in self._feeders:
+            await feeder.stop()
+        self._feeders.clear()
+        
+        for pipeline in self.pipelines.values():
+            await pipeline.stop()
+        self.pipelines.clear()
+        
+        for publisher in self._publishers.values():
+            await publisher.close()
+        self._publishers.clear()
+        
         if self.room:
             await self.room.disconnect()
             self.connected = False
     
     async def get_room_info(self, room_name: str) -> Dict:
         """Get room information"""
-        import aiohttp
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.api_url}/rooms/{room_name}") as response:
-                return await response.json()
+        return await self._request("GET", f"/rooms/{room_name}")
+    
+    async def get_room_infos(self, room_names: List[str]) -> Dict:
+        """Get information about many rooms in one request"""
+        return await self._request("POST", "/rooms/info:batch", json={"names": room_names})
     
     async def list_rooms(self) -> Dict:
         """List all active rooms"""
-        import aiohttp
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.api_url}/rooms") as response:
-                return await response.json()
+        return await self._request("GET", "/rooms")
 
 
 # Example usage functions
@@ -185,6 +365,7 @@ async def simple_broadcaster_example():
         print("Stopping broadcast...")
     finally:
         await client.disconnect()
+        await client.close()
 
 async def simple_viewer_example():
     """Example: Simple viewer that joins a room and receives streams"""
@@ -214,6 +395,7 @@ async def simple_viewer_example():
         print("Stopping viewer...")
     finally:
         await client.disconnect()
+        await client.close()
 
 if __name__ == "__main__":
     # Run broadcaster example
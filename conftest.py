@@ -0,0 +1,63 @@
+"""
+Shared fixtures: the fake LiveKit server and the API configured against it
+"""
+import asyncio
+import importlib
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmark import free_port
+from fake_livekit import FakeRoomService, start_fake_livekit
+
+API_KEY = "test-key"
+API_SECRET = "test-secret-test-secret-test-secret"
+
+
+@pytest.fixture
+def livekit():
+    """Fake LiveKit RoomService served from its own thread"""
+    service = FakeRoomService()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    port = free_port()
+    runner = asyncio.run_coroutine_threadsafe(start_fake_livekit(service, port=port), loop).result(5)
+    yield service, f"http://127.0.0.1:{port}"
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def main(request, livekit, tmp_path, monkeypatch):
+    """The API module configured against the fake, with either state store"""
+    _, url = livekit
+    store_url = "memory://" if request.param == "memory" else f"sqlite:///{tmp_path}/state.db"
+    for key, value in {
+        "LIVEKIT_URL": url,
+        "LIVEKIT_API_KEY": API_KEY,
+        "LIVEKIT_API_SECRET": API_SECRET,
+        "LIVEKIT_WEBHOOKS_ENABLED": "true",
+        "STATE_STORE_URL": store_url,
+        "ROOM_CACHE_TTL": "0.05",
+        "JOIN_RATE": "0",
+        "JOIN_ROOM_RATE": "0",
+    }.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.delitem(sys.modules, "main", raising=False)
+    return importlib.import_module("main")
+
+
+@pytest.fixture
+def client(main):
+    with TestClient(main.app) as client:
+        deadline = time.monotonic() + 10
+        while client.get("/ready").status_code != 200:
+            assert time.monotonic() < deadline, "API did not become ready"
+            time.sleep(0.05)
+        yield client
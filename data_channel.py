@@ -0,0 +1,193 @@
+"""
+Batched data-channel messaging for the LiveKit Streaming Platform
+
+Messages are coalesced into packets of length-prefixed frames:
+    MAGIC (2 bytes) | codec (1 byte) | (length: uint32 BE | payload)*
+Packets that do not start with MAGIC are treated as a single plain JSON
+message, so peers still using one-message-per-packet JSON interoperate.
+"""
+import asyncio
+import json
+import struct
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # optional, JSON framing is used without it
+    msgpack = None
+
+MAGIC = b"\xb7\x4c"
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+_LENGTH = struct.Struct(">I")
+_HEADER_SIZE = len(MAGIC) + 1
+
+PublishFn = Callable[[bytes], Awaitable[None]]
+
+
+def _encode_one(message, codec: int) -> bytes:
+    if codec == CODEC_MSGPACK:
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, separators=(",", ":")).encode()
+
+
+def _decode_one(payload: bytes, codec: int):
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Received msgpack packet but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def default_codec() -> int:
+    return CODEC_MSGPACK if msgpack is not None else CODEC_JSON
+
+
+def encode_packet(messages: List, codec: Optional[int] = None) -> bytes:
+    """Frame several messages into one packet"""
+    codec = default_codec() if codec is None else codec
+    parts = [MAGIC, bytes((codec,))]
+    for message in messages:
+        payload = _encode_one(message, codec)
+        parts.append(_LENGTH.pack(len(payload)))
+        parts.append(payload)
+    return b"".join(parts)
+
+
+def decode_packet(data: bytes) -> List:
+    """Split a received packet back into messages"""
+    if not data.startswith(MAGIC):
+        return [json.loads(data)]
+
+    if len(data) < _HEADER_SIZE:
+        raise ValueError("Data packet header is truncated")
+    codec = data[len(MAGIC)]
+    if codec not in (CODEC_JSON, CODEC_MSGPACK):
+        raise ValueError(f"Unknown data packet codec: {codec}")
+    messages = []
+    offset = _HEADER_SIZE
+    while offset < len(data):
+        try:
+            (length,) = _LENGTH.unpack_from(data, offset)
+        except struct.error:
+            raise ValueError("Truncated data packet length")
+        offset += _LENGTH.size
+        if offset + length > len(data):
+            raise ValueError("Truncated data packet")
+        messages.append(_decode_one(data[offset:offset + length], codec))
+        offset += length
+    return messages
+
+
+class DataPublisher:
+    """Coalesces outgoing messages into packets on a time or size window.
+
+    ``send`` waits while the queue is full, which pushes back on producers
+    that outpace the data channel; ``try_send`` drops instead.
+    """
+
+    def __init__(self, publish: PublishFn, max_delay: float = 0.02, max_bytes: int = 14000,
+                 queue_size: int = 1000, codec: Optional[int] = None):
+        self._publish = publish
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self.codec = default_codec() if codec is None else codec
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        self.messages_sent = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self._unsent = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "messages_sent": self.messages_sent,
+            "packets_sent": self.packets_sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+        }
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def send(self, message):
+        """Queue a message, waiting for room if the queue is full"""
+        await self.queue.put(_encode_one(message, self.codec))
+        self._unsent += 1
+
+    def try_send(self, message) -> bool:
+        """Queue a message without waiting, dropping it if the queue is full"""
+        try:
+            self.queue.put_nowait(_encode_one(message, self.codec))
+            self._unsent += 1
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def _run(self):
+        header = MAGIC + bytes((self.codec,))
+        carry = None
+        while True:
+            payload = carry if carry is not None else await self.queue.get()
+            carry = None
+            frames = [header]
+            size = len(header)
+            deadline = time.monotonic() + self.max_delay
+
+            while True:
+                frames.append(_LENGTH.pack(len(payload)))
+                frames.append(payload)
+                size += _LENGTH.size + len(payload)
+                if size >= self.max_bytes:
+                    break
+
+                try:
+                    if self.queue.empty():
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        payload = await asyncio.wait_for(self.queue.get(), timeout)
+                    else:
+                        payload = self.queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+
+                # Start a new packet rather than overflow this one
+                if size + _LENGTH.size + len(payload) > self.max_bytes:
+                    carry = payload
+                    break
+
+            count = (len(frames) - 1) // 2
+            try:
+                await self._publish(b"".join(frames))
+                self.packets_sent += 1
+                self.messages_sent += count
+                self.bytes_sent += size
+            except Exception as e:
+                print(f"⚠️ Data packet publish failed: {e}")
+            finally:
+                self._unsent -= count
+
+    async def flush(self):
+        """Wait until every queued message has been published"""
+        while self._unsent > 0 and self._task is not None:
+            await asyncio.sleep(self.max_delay / 2 or 0.001)
+
+    async def close(self):
+        """Publish what is queued, then stop"""
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,212 @@
+"""
+Local stand-in for the LiveKit RoomService Twirp API, used by the benchmarks
+
+Run standalone with:
+    python fake_livekit.py --port 7880 --rooms 10000 --latency-ms 5
+"""
+import argparse
+import json
+import asyncio
+import random
+import time
+from typing import Dict
+
+from aiohttp import web
+from livekit.protocol import models
+from livekit.protocol import room as room_proto
+
+TWIRP_PREFIX = "/twirp/livekit.RoomService/"
+
+
+class FakeRoomService:
+    """In-memory rooms and participants served over Twirp/protobuf"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rooms: Dict[str, models.Room] = {}
+        self.participants: Dict[str, Dict[str, models.ParticipantInfo]] = {}
+        self.calls: Dict[str, int] = {}
+
+        self._handlers = {
+            "ListRooms": (room_proto.ListRoomsRequest, self.list_rooms),
+            "CreateRoom": (room_proto.CreateRoomRequest, self.create_room),
+            "DeleteRoom": (room_proto.DeleteRoomRequest, self.delete_room),
+            "ListParticipants": (room_proto.ListParticipantsRequest, self.list_participants),
+            "GetParticipant": (room_proto.RoomParticipantIdentity, self.get_participant),
+            "RemoveParticipant": (room_proto.RoomParticipantIdentity, self.remove_participant),
+            "MutePublishedTrack": (room_proto.MuteRoomTrackRequest, self.mute_published_track),
+        }
+
+    def seed(self, rooms: int, participants_per_room: int = 0, prefix: str = "room-"):
+        """Pre-populate rooms, each with some publishing participants"""
+        for i in range(rooms):
+            name = f"{prefix}{i:06d}"
+            self.create_room(room_proto.CreateRoomRequest(name=name, max_participants=1000))
+            for j in range(participants_per_room):
+                self.add_participant(name, f"user-{j}", tracks=2 if j == 0 else 0)
+
+    def add_participant(self, room_name: str, identity: str, tracks: int = 0) -> models.ParticipantInfo:
+        """Simulate a participant connecting to a room"""
+        participant = models.ParticipantInfo(
+            sid=f"PA_{room_name}_{identity}",
+            identity=identity,
+            name=identity,
+            state=models.ParticipantInfo.ACTIVE,
+            joined_at=int(time.time()),
+        )
+        participant.permission.can_publish = tracks > 0
+        participant.permission.can_subscribe = True
+        for k in range(tracks):
+            participant.tracks.add(
+                sid=f"TR_{room_name}_{identity}_{k}",
+                type=models.TrackType.AUDIO if k == 0 else models.TrackType.VIDEO,
+            )
+        self.participants.setdefault(room_name, {})[identity] = participant
+        self._sync_counts(room_name)
+        return participant
+
+    def _sync_counts(self, room_name: str):
+        room = self.rooms.get(room_name)
+        if room is None:
+            return
+        participants = self.participants.get(room_name, {}).values()
+        room.num_participants = len(participants)
+        room.num_publishers = sum(1 for p in participants if len(p.tracks) > 0)
+
+    def list_rooms(self, request: room_proto.ListRoomsRequest):
+        if request.names:
+            rooms = [self.rooms[name] for name in request.names if name in self.rooms]
+        else:
+            rooms = list(self.rooms.values())
+        return room_proto.ListRoomsResponse(rooms=rooms)
+
+    def create_room(self, request: room_proto.CreateRoomRequest):
+        room = self.rooms.get(request.name)
+        if room is None:
+            room = models.Room(
+                sid=f"RM_{request.name}",
+                name=request.name,
+                empty_timeout=request.empty_timeout,
+                max_participants=request.max_participants,
+                creation_time=int(time.time()),
+                metadata=request.metadata,
+            )
+            self.rooms[request.name] = room
+            self.participants.setdefault(request.name, {})
+        return room
+
+    def delete_room(self, request: room_proto.DeleteRoomRequest):
+        self.rooms.pop(request.room, None)
+        self.participants.pop(request.room, None)
+        return room_proto.DeleteRoomResponse()
+
+    def list_participants(self, request: room_proto.ListParticipantsRequest):
+        participants = self.participants.get(request.room, {}).values()
+        return room_proto.ListParticipantsResponse(participants=list(participants))
+
+    def get_participant(self, request: room_proto.RoomParticipantIdentity):
+        participant = self.participants.get(request.room, {}).get(request.identity)
+        if participant is None:
+            raise LookupError("participant not found")
+        return participant
+
+    def remove_participant(self, request: room_proto.RoomParticipantIdentity):
+        participants = self.participants.get(request.room, {})
+        if participants.pop(request.identity, None) is None:
+            raise LookupError("participant not found")
+        self._sync_counts(request.room)
+        return room_proto.RemoveParticipantResponse()
+
+    def mute_published_track(self, request: room_proto.MuteRoomTrackRequest):
+        participant = self.participants.get(request.room, {}).get(request.identity)
+        if participant is None:
+            raise LookupError("participant not found")
+        for track in participant.tracks:
+            if track.sid == request.track_sid:
+                track.muted = request.muted
+                return room_proto.MuteRoomTrackResponse(track=track)
+        raise LookupError("track not found")
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        handler = self._handlers.get(method)
+        if handler is None:
+            return web.json_response({"code": "bad_route", "msg": f"no handler for {method}"}, status=404)
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        request_class, fn = handler
+        try:
+            message = request_class.FromString(await request.read())
+            response = fn(message)
+        except LookupError as e:
+            return web.json_response({"code": "not_found", "msg": str(e)}, status=404)
+        return web.Response(body=response.SerializeToString(), content_type="application/protobuf")
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "calls": self.calls,
+            "rooms": len(self.rooms),
+            "participants": sum(len(p) for p in self.participants.values()),
+        })
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        self.calls = {}
+        return web.json_response({"success": True})
+
+    async def handle_add_participants(self, request: web.Request) -> web.Response:
+        room_name = request.match_info["room_name"]
+        if room_name not in self.rooms:
+            return web.json_response({"code": "not_found", "msg": "room not found"}, status=404)
+        count = int(request.query.get("count", 1))
+        start = len(self.participants.get(room_name, {}))
+        for i in range(count):
+            self.add_participant(room_name, f"synthetic-{start + i}")
+        return web.json_response({"num_participants": self.rooms[room_name].num_participants})
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(TWIRP_PREFIX + "{method}", self.handle)
+        # Control endpoints for benchmark scenarios
+        app.router.add_get("/_fake/stats", self.handle_stats)
+        app.router.add_post("/_fake/stats/reset", self.handle_reset)
+        app.router.add_post("/_fake/rooms/{room_name}/participants", self.handle_add_participants)
+        return app
+
+
+async def start_fake_livekit(service: FakeRoomService, host: str = "127.0.0.1",
+                             port: int = 7880) -> web.AppRunner:
+    """Serve a fake RoomService in the running event loop"""
+    runner = web.AppRunner(service.make_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def main(args: argparse.Namespace):
+    nodes = []
+    for index in range(args.nodes):
+        service = FakeRoomService(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000)
+        service.seed(args.rooms, args.participants, prefix=f"room-{index}-" if args.nodes > 1 else "room-")
+        port = args.port + index
+        await start_fake_livekit(service, args.host, port)
+        print(f"🧪 Fake LiveKit RoomService on http://{args.host}:{port} - {len(service.rooms)} rooms")
+        nodes.append({"name": f"fake-{index}", "url": f"http://{args.host}:{port}"})
+    if args.nodes > 1:
+        print(f"LIVEKIT_NODES='{json.dumps(nodes)}'")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake LiveKit RoomService")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7880)
+    parser.add_argument("--rooms", type=int, default=0, help="rooms to seed")
+    parser.add_argument("--participants", type=int, default=0, help="participants per seeded room")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added latency per RPC")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra latency per RPC")
+    parser.add_argument("--nodes", type=int, default=1, help="independent servers on consecutive ports")
+    asyncio.run(main(parser.parse_args()))
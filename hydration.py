@@ -0,0 +1,183 @@
+"""
+Rebuilding local room state from LiveKit after a restart for the LiveKit Streaming Platform
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from livekit.protocol.models import ParticipantInfo, Room
+
+from state_store import StateStore
+
+DEFAULT_MAX_PARTICIPANTS = 100
+
+RoomsLoader = Callable[[], Awaitable[Iterable[Room]]]
+RoomGetter = Callable[[str], Awaitable[Optional[Room]]]
+ParticipantsFetcher = Callable[[str], Awaitable[List[ParticipantInfo]]]
+RoomChanged = Callable[[str], None]
+
+
+def room_config_from_metadata(room: Room) -> Dict:
+    """Local room config recovered from the metadata written at creation"""
+    try:
+        metadata = json.loads(room.metadata) if room.metadata else {}
+    except ValueError:
+        metadata = {}
+    if not isinstance(metadata, dict):
+        metadata = {}
+
+    created_at = metadata.get("created_at")
+    if not created_at and room.creation_time:
+        created_at = datetime.fromtimestamp(room.creation_time).isoformat()
+    return {
+        "sid": room.sid,
+        "name": room.name,
+        "max_participants": (
+            metadata.get("max_participants") or room.max_participants or DEFAULT_MAX_PARTICIPANTS
+        ),
+        "created_at": created_at or datetime.now().isoformat(),
+        "audio_enabled": metadata.get("audio_enabled", True),
+        "video_enabled": metadata.get("video_enabled", True),
+        "node": metadata.get("node"),
+    }
+
+
+class RoomHydrator:
+    """Restores room configs and participants missing from the state store.
+
+    Rooms LiveKit already knows about are hydrated busiest first: the ``hot``
+    ones (those with participants, up to ``hot_rooms``) before the service
+    reports ready, the rest afterwards in the background. A room can also be
+    hydrated on demand, e.g. by a join that arrives before its turn.
+    """
+
+    def __init__(self, store: StateStore, load_rooms: RoomsLoader, get_room: RoomGetter,
+                 fetch_participants: ParticipantsFetcher, concurrency: int = 20,
+                 hot_rooms: int = 100, retry_interval: float = 5.0,
+                 on_restored: Optional[RoomChanged] = None):
+        self.store = store
+        self._load_rooms = load_rooms
+        self._get_room = get_room
+        self._fetch_participants = fetch_participants
+        self._on_restored = on_restored
+        self.concurrency = concurrency
+        self.hot_rooms = hot_rooms
+        self.retry_interval = retry_interval
+
+        self.phase = "pending"
+        self.rooms_total = 0
+        self.hot_total = 0
+        self.present = 0
+        self.hydrated = 0
+        self.failed = 0
+        self.ready = asyncio.Event()
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    @property
+    def stats(self) -> Dict:
+        end = self._finished_at or time.monotonic()
+        elapsed = end - self._started_at if self._started_at is not None else 0.0
+        return {
+            "ready": self.ready.is_set(),
+            "phase": self.phase,
+            "rooms_total": self.rooms_total,
+            "hot_rooms": self.hot_total,
+            "already_present": self.present,
+            "hydrated": self.hydrated,
+            "failed": self.failed,
+            "pending": max(0, self.rooms_total - self.present - self.hydrated - self.failed),
+            "elapsed_seconds": round(elapsed, 3),
+        }
+
+    async def _restore(self, room: Room) -> Dict:
+        participants = await self._fetch_participants(room.name)
+        # One step, so a create or another worker storing the room meanwhile
+        # wins and joins reported by webhooks during the listing are kept
+        config = await self.store.restore_room(
+            room.name, room_config_from_metadata(room), [p.identity for p in participants]
+        )
+        # Responses built without the config are now out of date
+        if self._on_restored is not None:
+            self._on_restored(room.name)
+        return config
+
+    async def _hydrate(self, room: Room) -> Dict:
+        task = self._inflight.get(room.name)
+        if task is None:
+            task = asyncio.create_task(self._restore(room))
+            self._inflight[room.name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(room.name, None))
+        # Shield so a cancelled join does not cancel a shared restore
+        return await asyncio.shield(task)
+
+    async def hydrate(self, name: str) -> Optional[Dict]:
+        """Config of a room LiveKit has but the state store lacks, restoring it now"""
+        room = await self._get_room(name)
+        if room is None:
+            return None
+        return await self._hydrate(room)
+
+    async def _hydrate_all(self, rooms: List[Room]):
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def run(room: Room):
+            async with semaphore:
+                try:
+                    await self._hydrate(room)
+                    self.hydrated += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"⚠️ Failed to restore room {room.name}: {e}")
+
+        await asyncio.gather(*(run(room) for room in rooms))
+
+    async def run(self):
+        """Hydrate every missing room, hot ones first"""
+        self._started_at = time.monotonic()
+        while True:
+            try:
+                rooms = list(await self._load_rooms())
+                configs = await self.store.get_rooms([room.name for room in rooms])
+                break
+            except Exception as e:
+                print(f"⚠️ Room rehydration waiting for LiveKit: {e}")
+                await asyncio.sleep(self.retry_interval)
+
+        missing = sorted(
+            (room for room in rooms if room.name not in configs),
+            key=lambda room: room.num_participants,
+            reverse=True,
+        )
+        self.rooms_total = len(rooms)
+        self.present = len(rooms) - len(missing)
+        hot = [room for room in missing[:self.hot_rooms] if room.num_participants > 0]
+        self.hot_total = len(hot)
+
+        self.phase = "hot"
+        await self._hydrate_all(hot)
+        self.ready.set()
+        print(f"✅ Restored {len(hot)} active rooms, {len(missing) - len(hot)} more in background")
+
+        self.phase = "background"
+        await self._hydrate_all(missing[len(hot):])
+        self.phase = "done"
+        self._finished_at = time.monotonic()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -4,13 +4,31 @@ import asyncio
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import json
+import base64
+import math
+from itertools import islice
 
-from fastapi import FastAPI, HTTPException, Depends, WebSocket
+import aiohttp
+
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import orjson
 
 from models import *
+from room_cache import RoomSnapshotCache
+from room_hub import RoomHub
+from tokens import TokenMinter
+from state_store import create_state_store
+from metrics import MetricsMiddleware, Registry, TimedProxy
+from response_cache import ResponseCache, etag_matches, make_etag
+from admission import AdmissionRejected, JoinAdmission
+from hydration import RoomHydrator
+from nodes import NodeRouter, load_nodes
+from occupancy import OccupancySampler, OccupancyStore, parse_tiers
+from resilience import CircuitBreaker, CircuitOpenError, ResilientProxy, UpstreamTimeout, is_upstream_failure
 
 from livekit import api
 from livekit.protocol import room as room_proto
@@ -22,6 +40,31 @@ load_dotenv()
 # *Uitlize the API
 app = FastAPI(title="LiveKit Streaming Platform API", version="1.0.0")
 
+# Metrics, exposed on /metrics
+metrics = Registry()
+HTTP_LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"]
+)
+HTTP_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests being served")
+UPSTREAM_LATENCY = metrics.histogram(
+    "livekit_rpc_duration_seconds", "LiveKit RoomService call latency", ["rpc"]
+)
+UPSTREAM_ERRORS = metrics.counter(
+    "livekit_rpc_errors_total", "Failed LiveKit RoomService calls", ["rpc", "error"]
+)
+STATE_STORE_LATENCY = metrics.histogram(
+    "state_store_duration_seconds", "State store operation latency", ["op"]
+)
+STATE_STORE_ERRORS = metrics.counter(
+    "state_store_errors_total", "Failed state store operations", ["op", "error"]
+)
+TOKEN_MINT_LATENCY = metrics.histogram(
+    "token_mint_duration_seconds", "Time spent minting join tokens", ["mode"]
+)
+JOIN_ADMISSION_WAIT = metrics.histogram(
+    "join_admission_wait_seconds", "Time joins spent queued for admission"
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -29,34 +72,281 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, latency=HTTP_LATENCY, in_flight=HTTP_IN_FLIGHT)
 
 # Configuration
 LIVEKIT_URL = os.getenv("LIVEKIT_URL")
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 
-livekit_api = api.LiveKitAPI(
-    url=LIVEKIT_URL,
-    api_key=LIVEKIT_API_KEY,
-    api_secret=LIVEKIT_API_SECRET,
+# Several LiveKit deployments can be driven at once: LIVEKIT_NODES is a JSON
+# list (or a path to one) of {"name", "url", "api_key", "api_secret", "weight"},
+# and new rooms go to a node by consistent hashing or by least load
+LIVEKIT_NODES = os.getenv("LIVEKIT_NODES")
+ROOM_PLACEMENT = os.getenv("ROOM_PLACEMENT", "hash")
+LIVEKIT_MAX_CONNECTIONS = int(os.getenv("LIVEKIT_MAX_CONNECTIONS", 100))
+
+# With webhooks enabled room state is pushed to /webhooks/livekit, so
+# polling only reconciles the occasional missed event
+WEBHOOKS_ENABLED = os.getenv("LIVEKIT_WEBHOOKS_ENABLED", "false").lower() == "true"
+
+# How old a room snapshot may get before a read waits for a refresh,
+# and how often the background refresher reloads it
+ROOM_CACHE_TTL = float(os.getenv("ROOM_CACHE_TTL", 60 if WEBHOOKS_ENABLED else 5))
+ROOM_CACHE_REFRESH_INTERVAL = float(os.getenv("ROOM_CACHE_REFRESH_INTERVAL", 30 if WEBHOOKS_ENABLED else 2))
+
+# Websocket fan-out: how often each room watcher checks the snapshot,
+# idle heartbeat period (0 disables) and per-socket queue bound
+WS_POLL_INTERVAL = float(os.getenv("WS_POLL_INTERVAL", 1))
+WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", 30))
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", 16))
+
+# Signed tokens are reused for identical join requests within this window
+# (0 disables); bulk joins at least this large are signed in a process pool
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", 30))
+TOKEN_POOL_THRESHOLD = int(os.getenv("TOKEN_POOL_THRESHOLD", 64))
+
+# Upper bound on concurrent upstream lookups per batch request
+ROOM_INFO_BATCH_CONCURRENCY = int(os.getenv("ROOM_INFO_BATCH_CONCURRENCY", 10))
+
+# Largest page GET /rooms serves, and how many room configs an NDJSON
+# stream loads from the state store at a time
+ROOMS_PAGE_MAX = int(os.getenv("ROOMS_PAGE_MAX", 1000))
+ROOMS_STREAM_CHUNK = int(os.getenv("ROOMS_STREAM_CHUNK", 500))
+
+# Default and maximum concurrent LiveKit calls for bulk room lifecycle requests
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", 20))
+BULK_MAX_CONCURRENCY = int(os.getenv("BULK_MAX_CONCURRENCY", 100))
+
+# Default concurrent LiveKit calls for bulk mute/kick, capped like the above
+MODERATION_CONCURRENCY = int(os.getenv("MODERATION_CONCURRENCY", 50))
+
+# Joins per second (0 for no limit) overall and per room, with bursts; the
+# excess waits in a per-room queue and is turned away with 429 once it is full;
+# hosts wait in a smaller lane of their own that is served first
+JOIN_RATE = float(os.getenv("JOIN_RATE", 200))
+JOIN_BURST = float(os.getenv("JOIN_BURST", 400))
+JOIN_ROOM_RATE = float(os.getenv("JOIN_ROOM_RATE", 50))
+JOIN_ROOM_BURST = float(os.getenv("JOIN_ROOM_BURST", 100))
+JOIN_QUEUE_SIZE = int(os.getenv("JOIN_QUEUE_SIZE", 1000))
+JOIN_MAX_WAIT = float(os.getenv("JOIN_MAX_WAIT", 10))
+JOIN_HOST_QUEUE_SIZE = int(os.getenv("JOIN_HOST_QUEUE_SIZE", 100))
+
+# Serialized GET /rooms and GET /rooms/{room_name} bodies kept per state
+# version, and serialized per-room entries of the room list
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+ROOM_FRAGMENT_CACHE_SIZE = int(os.getenv("ROOM_FRAGMENT_CACHE_SIZE", 50000))
+
+# Every LiveKit call gets a deadline; list/get calls are retried with
+# jittered backoff, and repeated failures open a breaker that fails fast
+LIVEKIT_RPC_TIMEOUT = float(os.getenv("LIVEKIT_RPC_TIMEOUT", 5))
+LIVEKIT_RPC_RETRIES = int(os.getenv("LIVEKIT_RPC_RETRIES", 2))
+LIVEKIT_RETRY_BACKOFF = float(os.getenv("LIVEKIT_RETRY_BACKOFF", 0.1))
+LIVEKIT_RETRY_BACKOFF_MAX = float(os.getenv("LIVEKIT_RETRY_BACKOFF_MAX", 1))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", 10))
+
+# While LiveKit is failing, reads serve last-known-good data up to this age
+STALE_MAX_AGE = float(os.getenv("STALE_MAX_AGE", 300))
+
+# After a restart, rooms with participants (up to this many) are restored
+# into the state store before /ready passes; the rest follow in the background
+HYDRATE_HOT_ROOMS = int(os.getenv("HYDRATE_HOT_ROOMS", 100))
+HYDRATE_CONCURRENCY = int(os.getenv("HYDRATE_CONCURRENCY", 20))
+
+node_router = NodeRouter(
+    load_nodes(LIVEKIT_NODES, LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET),
+    placement=ROOM_PLACEMENT,
+    resolve=lambda name: stored_node(name),
+)
+
+# Occupancy history per room as "seconds per sample:samples kept" tiers,
+# finest first; coarser tiers are averaged down from the finer ones
+OCCUPANCY_TIERS = parse_tiers(os.getenv("OCCUPANCY_TIERS", "10:180,60:240,900:192"))
+
+# Created on startup, the clients' HTTP session needs a running event loop
+livekit_session: Optional[aiohttp.ClientSession] = None
+room_service: Optional[NodeRouter] = None
+webhook_receivers: List[api.WebhookReceiver] = []
+
+# Room configs and participants, shared across uvicorn workers when backed
+# by a file (sqlite:///state.db); configs are read through a short local cache
+STATE_STORE_URL = os.getenv("STATE_STORE_URL", "memory://")
+STATE_CACHE_TTL = float(os.getenv("STATE_CACHE_TTL", 1))
+
+# A join reserves a slot until the participant_joined webhook confirms it;
+# without webhooks nothing confirms, so reservations do not expire by default
+RESERVATION_TTL = float(os.getenv("RESERVATION_TTL", 120 if WEBHOOKS_ENABLED else 0))
+
+state_store = TimedProxy(
+    create_state_store(
+        STATE_STORE_URL,
+        cache_ttl=STATE_CACHE_TTL,
+        reservation_ttl=RESERVATION_TTL,
+    ),
+    STATE_STORE_LATENCY,
+    STATE_STORE_ERRORS,
+    "op",
+)
+
+# Webhook-maintained participant lists are per process: with a shared store
+# each worker would only see the events delivered to it, so they are listed
+TRACK_PARTICIPANTS = WEBHOOKS_ENABLED and not state_store.shared
+
+async def fetch_rooms(names: Optional[List[str]] = None):
+    """Fetch rooms from LiveKit, all of them unless names are given"""
+    list_request = room_proto.ListRoomsRequest(names=names or [])
+    rooms_response = await room_service.list_rooms(list_request)
+    return list(rooms_response.rooms)
+
+async def stored_node(room_name: str) -> Optional[str]:
+    """Node a room was placed on, as recorded in its config"""
+    config = await state_store.get_room(room_name)
+    return config.get("node") if config else None
+
+room_cache = RoomSnapshotCache(
+    fetch_rooms,
+    ttl=ROOM_CACHE_TTL,
+    refresh_interval=ROOM_CACHE_REFRESH_INTERVAL,
+    max_stale=STALE_MAX_AGE,
+)
+
+room_hydrator = RoomHydrator(
+    state_store,
+    load_rooms=lambda: room_cache.rooms_after(),
+    get_room=room_cache.get_room,
+    fetch_participants=lambda name: get_participants(name),
+    concurrency=HYDRATE_CONCURRENCY,
+    hot_rooms=HYDRATE_HOT_ROOMS,
+    on_restored=room_cache.touch,
+)
+
+occupancy_store = OccupancyStore(OCCUPANCY_TIERS)
+occupancy_sampler = OccupancySampler(occupancy_store, load_rooms=lambda: room_cache.rooms_after())
+
+join_admission = JoinAdmission(
+    global_rate=JOIN_RATE,
+    global_burst=JOIN_BURST,
+    room_rate=JOIN_ROOM_RATE,
+    room_burst=JOIN_ROOM_BURST,
+    queue_size=JOIN_QUEUE_SIZE,
+    max_wait=JOIN_MAX_WAIT,
+    host_queue_size=JOIN_HOST_QUEUE_SIZE,
+)
+
+token_minter = TokenMinter(
+    LIVEKIT_API_KEY,
+    LIVEKIT_API_SECRET,
+    cache_ttl=TOKEN_CACHE_TTL,
+    pool_threshold=TOKEN_POOL_THRESHOLD,
+)
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+room_fragments = ResponseCache(ROOM_FRAGMENT_CACHE_SIZE)
+
+room_hub = RoomHub(
+    room_cache.get_room,
+    poll_interval=WS_POLL_INTERVAL,
+    heartbeat_interval=WS_HEARTBEAT_INTERVAL,
+    queue_size=WS_QUEUE_SIZE,
 )
 
-active_rooms: Dict[str, Dict] = {}
-room_participants: Dict[str, List[str]] = {}
+# Local state gauges and counters, read at scrape time
+metrics.gauge("rooms_tracked", "Rooms in the local room snapshot",
+              callback=lambda: room_cache.room_count)
+metrics.gauge("participants_tracked", "Participants across rooms in the local room snapshot",
+              callback=lambda: room_cache.participant_total)
+metrics.gauge("websocket_connections", "Open /ws/rooms connections",
+              callback=lambda: room_hub.connection_count)
+metrics.gauge("websocket_watched_rooms", "Rooms with at least one websocket subscriber",
+              callback=lambda: room_hub.room_count)
+metrics.counter("response_cache_hits_total", "Room responses served from serialized cache",
+                callback=lambda: response_cache.hits)
+metrics.counter("response_cache_misses_total", "Room responses that had to be serialized",
+                callback=lambda: response_cache.misses)
+metrics.gauge("occupancy_rooms_tracked", "Rooms with occupancy history",
+              callback=lambda: occupancy_store.room_count)
+metrics.gauge("occupancy_memory_bytes", "Memory held by occupancy ring buffers",
+              callback=lambda: occupancy_store.nbytes)
+metrics.gauge("join_queue_depth", "Joins waiting for admission",
+              callback=lambda: join_admission.queue_depth)
+metrics.counter("join_rejected_total", "Joins turned away by admission control",
+                callback=lambda: join_admission.rejected)
+metrics.gauge("rooms_pending_hydration", "LiveKit rooms not yet restored into local state",
+              callback=lambda: room_hydrator.stats["pending"])
+metrics.gauge("livekit_circuit_open", "LiveKit nodes whose calls are being short-circuited",
+              callback=lambda: sum(
+                  node.breaker is not None and node.breaker.state == CircuitBreaker.OPEN
+                  for node in node_router.nodes.values()
+              ))
+metrics.counter("livekit_rpc_retries_total", "LiveKit calls retried after an upstream failure",
+                callback=lambda: room_service.retry_count if room_service else 0)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the streaming platform"""
+    global livekit_session, room_service, webhook_receivers
     print(f"🚀 LiveKit Streaming Platform API starting...")
-    print(f"📡 LiveKit Server: {LIVEKIT_URL}")
     
-    # Test connection to LiveKit server
+    # One pooled HTTP session shared by every node's client
+    livekit_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=LIVEKIT_MAX_CONNECTIONS)
+    )
+    for node in node_router.nodes.values():
+        print(f"📡 LiveKit Server: {node.url} ({node.name})")
+        node.api = api.LiveKitAPI(
+            url=node.url,
+            api_key=node.api_key,
+            api_secret=node.api_secret,
+            session=livekit_session,
+        )
+        # Nodes fail independently, so each gets its own breaker
+        node.breaker = CircuitBreaker(
+            failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BREAKER_RESET_TIMEOUT,
+        )
+        node.room_service = ResilientProxy(
+            TimedProxy(node.api.room, UPSTREAM_LATENCY, UPSTREAM_ERRORS, "rpc"),
+            node.breaker,
+            timeout=LIVEKIT_RPC_TIMEOUT,
+            retries=LIVEKIT_RPC_RETRIES,
+            backoff=LIVEKIT_RETRY_BACKOFF,
+            backoff_max=LIVEKIT_RETRY_BACKOFF_MAX,
+        )
+    room_service = node_router
+    
+    credentials = {node.credentials for node in node_router.nodes.values()}
+    webhook_receivers = [
+        api.WebhookReceiver(api.TokenVerifier(api_key, api_secret))
+        for api_key, api_secret in credentials
+    ]
+    
+    # Test connection to LiveKit server and warm the room cache
     try:
-        list_request = room_proto.ListRoomsRequest()
-        rooms_response = await livekit_api.room.list_rooms(list_request)
-        print(f"✅ Connected to LiveKit server - {len(rooms_response.rooms)} rooms active")
+        rooms = await room_cache.refresh()
+        print(f"✅ Connected to LiveKit server - {len(rooms)} rooms active")
     except Exception as e:
         print(f"❌ Failed to connect to LiveKit server: {e}")
+    
+    room_cache.start()
+    room_hydrator.start()
+    occupancy_sampler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release background tasks and upstream connections"""
+    await room_hydrator.stop()
+    await occupancy_sampler.stop()
+    await join_admission.close()
+    await room_hub.close()
+    await room_cache.stop()
+    token_minter.close()
+    await state_store.close()
+    for node in node_router.nodes.values():
+        if node.api:
+            await node.api.aclose()
+    if livekit_session:
+        await livekit_session.close()
 
 @app.get("/")
 async def root():
@@ -68,36 +358,112 @@ async def root():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/nodes")
+async def list_nodes():
+    """LiveKit nodes with their placed rooms, load and breaker state"""
+    return {"placement": node_router.placement, "nodes": node_router.stats}
+
+@app.get("/admission")
+async def admission_stats(room_name: Optional[str] = None):
+    """Join admission counters, queue depth and wait times"""
+    stats = join_admission.stats
+    if room_name:
+        stats["room_queue_depth"] = join_admission.room_depth(room_name)
+    return stats
+
+@app.get("/ready")
+async def ready():
+    """Readiness check, passing once rooms with participants are restored"""
+    stats = room_hydrator.stats
+    return Response(
+        orjson.dumps(stats),
+        status_code=200 if stats["ready"] else 503,
+        media_type="application/json",
+    )
+
+def http_error(e: Exception, status_code: int, action: str) -> HTTPException:
+    """Map a failure to an HTTP error, with 503/504 when LiveKit is the cause"""
+    if isinstance(e, AdmissionRejected):
+        return HTTPException(
+            status_code=429,
+            detail=f"{action}: {str(e)}",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=f"{action}: {str(e)}",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    if isinstance(e, UpstreamTimeout):
+        return HTTPException(status_code=504, detail=f"{action}: {str(e)}")
+    return HTTPException(status_code=status_code, detail=f"{action}: {str(e)}")
+
+def staleness_headers(age: Optional[float]) -> Dict:
+    """Flag a response built from last-known-good data"""
+    if age is None:
+        return {}
+    return {"X-Data-Staleness": f"{age:.1f}"}
+
+async def gather_bounded(fn, items, concurrency: int):
+    """Run fn over items with at most `concurrency` calls in flight"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def run(item):
+        async with semaphore:
+            return await fn(item)
+    
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+
+async def provision_room(request: CreateRoomRequest):
+    """Create a room on LiveKit and return it with its local config"""
+    # Picked up front so the room records where it lives
+    node = room_service.place(request.name)
+    
+    # Create room configuration
+    room_config = room_proto.CreateRoomRequest(
+        name=request.name,
+        max_participants=request.max_participants,
+        empty_timeout=request.empty_timeout,
+        # Enough of the local config to rebuild it from LiveKit after a restart
+        metadata=json.dumps({
+            "max_participants": request.max_participants,
+            "audio_enabled": request.audio_enabled,
+            "video_enabled": request.video_enabled,
+            "created_at": datetime.now().isoformat(),
+            "node": node.name
+        })
+    )
+    
+    # Create room via LiveKit API
+    room = await room_service.create_room(room_config, node=node)
+    room_cache.update_room(room)
+    
+    return room, {
+        "sid": room.sid,
+        "name": room.name,
+        "max_participants": request.max_participants,
+        "created_at": datetime.now().isoformat(),
+        "audio_enabled": request.audio_enabled,
+        "video_enabled": request.video_enabled,
+        "node": node.name
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/rooms/create")
 async def create_room(request: CreateRoomRequest):
     """Create a new streaming room"""
     try:
-        # Create room configuration
-        room_config = room_proto.CreateRoomRequest(
-            name=request.name,
-            max_participants=request.max_participants,
-            empty_timeout=request.empty_timeout,
-            metadata=json.dumps({
-                "audio_enabled": request.audio_enabled,
-                "video_enabled": request.video_enabled,
-                "created_at": datetime.now().isoformat()
-            })
-        )
-        
-        # Create room via LiveKit API
-        room = await livekit_api.room.create_room(room_config)
+        room, config = await provision_room(request)
         
         # Store room info
-        active_rooms[request.name] = {
-            "sid": room.sid,
-            "name": room.name,
-            "max_participants": request.max_participants,
-            "created_at": datetime.now(),
-            "audio_enabled": request.audio_enabled,
-            "video_enabled": request.video_enabled
-        }
-        print(active_rooms)
-        room_participants[request.name] = []
+        await state_store.put_room(request.name, config)
+        room_cache.touch(request.name)
+        print(f"✅ Room created: {room.name}")
         
         return {
             "success": True,
@@ -105,56 +471,131 @@ async def create_room(request: CreateRoomRequest):
                 "name": room.name,
                 "sid": room.sid,
                 "max_participants": request.max_participants,
-                "created_at": datetime.now().isoformat()
+                "created_at": config["created_at"]
             }
         }
     
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to create room: {str(e)}")
+        raise http_error(e, 400, "Failed to create room")
+
+@app.post("/rooms/create:bulk")
+async def bulk_create_rooms(request: BulkCreateRoomsRequest):
+    """Create many streaming rooms concurrently"""
+    concurrency = min(request.concurrency or BULK_CONCURRENCY, BULK_MAX_CONCURRENCY)
+    
+    # A repeated name is created once, with its first settings
+    unique = {}
+    for room_request in request.rooms:
+        unique.setdefault(room_request.name, room_request)
+    room_requests = list(unique.values())
+    outcomes = await gather_bounded(provision_room, room_requests, concurrency)
+    
+    results = []
+    configs = {}
+    for room_request, outcome in zip(room_requests, outcomes):
+        if isinstance(outcome, Exception):
+            results.append({"name": room_request.name, "success": False, "error": str(outcome)})
+        else:
+            room, config = outcome
+            configs[room.name] = config
+            results.append({"name": room.name, "success": True, "sid": room.sid})
+    
+    # Store every created room in one batch
+    try:
+        if configs:
+            await state_store.put_rooms(configs)
+            for name in configs:
+                room_cache.touch(name)
+    except Exception as e:
+        raise http_error(e, 500, "Rooms created but not stored")
+    
+    return {
+        "success": len(configs) == len(room_requests),
+        "created": len(configs),
+        "results": results
+    }
+
+@app.post("/rooms/delete:bulk")
+async def bulk_delete_rooms(request: BulkDeleteRoomsRequest):
+    """Delete many rooms concurrently"""
+    concurrency = min(request.concurrency or BULK_CONCURRENCY, BULK_MAX_CONCURRENCY)
+    
+    async def deprovision_room(room_name: str):
+        delete_request = room_proto.DeleteRoomRequest(room=room_name)
+        await room_service.delete_room(delete_request)
+        room_cache.remove_room(room_name)
+    
+    names = list(dict.fromkeys(request.names))
+    outcomes = await gather_bounded(deprovision_room, names, concurrency)
+    
+    results = []
+    deleted = []
+    for room_name, outcome in zip(names, outcomes):
+        if isinstance(outcome, Exception):
+            results.append({"name": room_name, "success": False, "error": str(outcome)})
+        else:
+            deleted.append(room_name)
+            results.append({"name": room_name, "success": True})
+    
+    # Clean up local storage in one batch
+    try:
+        if deleted:
+            await state_store.delete_rooms(deleted)
+    except Exception as e:
+        raise http_error(e, 500, "Rooms deleted but not cleaned up")
+    
+    return {
+        "success": len(deleted) == len(names),
+        "deleted": len(deleted),
+        "results": results
+    }
+
+async def get_room_config(room_name: str) -> Optional[Dict]:
+    """Local config of a room, restoring it from LiveKit if not yet hydrated"""
+    config = await state_store.get_room(room_name)
+    if config is None:
+        config = await room_hydrator.hydrate(room_name)
+    return config
+
+def build_grants(room_name: str, is_host: bool) -> api.VideoGrants:
+    """Default permissions for a host or a viewer"""
+    return api.VideoGrants(
+        room_join=True,
+        room=room_name,
+        can_publish=is_host,
+        can_subscribe=True,
+        can_publish_data=is_host,
+    )
 
 @app.post("/rooms/{room_name}/join")
 async def join_room(room_name: str, request: JoinRoomRequest):
     """Generate join token for a participant"""
     try:
-        if room_name not in active_rooms:
+        room_config = await get_room_config(room_name)
+        if not room_config:
             raise HTTPException(status_code=404, detail="Room not found")
         
-        room_info = active_rooms[room_name]
+        # Spread join storms out; hosts skip ahead of queued viewers
+        waited = await join_admission.acquire(room_name, priority=request.is_host)
+        JOIN_ADMISSION_WAIT.observe(waited)
         
-        # Check participant limit
-        current_participants = len(room_participants.get(room_name, []))
-        if current_participants >= room_info["max_participants"]:
+        # Check participant limit and add participant to room
+        if not await state_store.admit(room_name, request.participant_name):
             raise HTTPException(status_code=400, detail="Room is full")
         
-        # Set default permissions   
-        video_grants = api.VideoGrants(
-            room_join=True,
-            room=room_name,
-            can_publish=request.is_host,
-            can_subscribe=True,
-            can_publish_data=request.is_host,
-        )
-        
-        token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        token.with_identity(request.participant_name)
-        token.with_name(request.participant_name)
-        token.with_grants(video_grants)
-
-        jwt_token = token.to_jwt()
-        
-        # Add participant to room
-        if room_name not in room_participants:
-            room_participants[room_name] = []
-        
-        if request.participant_name not in room_participants[room_name]:
-            room_participants[room_name].append(request.participant_name)
-
-        jwt_token = token.to_jwt()
+        # Set default permissions, signed for the node hosting the room
+        node = await node_router.locate(room_name, room_config.get("node"))
+        video_grants = build_grants(room_name, request.is_host)
+        with TOKEN_MINT_LATENCY.time(mode="single"):
+            jwt_token = token_minter.mint(
+                request.participant_name, request.participant_name, video_grants,
+                credentials=node.credentials,
+            )
         
         return {
             "success": True,
             "token": jwt_token,
-            "url": LIVEKIT_URL,
+            "url": node.url,
             "room_name": room_name,
             "participant_name": request.participant_name,
             "permissions": video_grants
@@ -163,94 +604,361 @@ async def join_room(room_name: str, request: JoinRoomRequest):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to join room: {str(e)}")
+        raise http_error(e, 400, "Failed to join room")
+
+@app.post("/rooms/{room_name}/join:bulk")
+async def bulk_join_room(room_name: str, request: BulkJoinRoomRequest):
+    """Generate join tokens for many participants in one request"""
+    try:
+        room_config = await get_room_config(room_name)
+    except Exception as e:
+        raise http_error(e, 400, "Failed to join room")
+    if not room_config:
+        raise HTTPException(status_code=404, detail="Room not found")
+    
+    # Every participant costs a token like a single join; the batch does not
+    # wait, whoever finds the buckets empty is turned away
+    hosts = [p for p in request.participants if p.is_host]
+    viewers = [p for p in request.participants if not p.is_host]
+    try:
+        granted_hosts, granted_viewers = join_admission.take_many(room_name, len(hosts), len(viewers))
+    except Exception as e:
+        raise http_error(e, 400, "Failed to join room")
+    throttled = {id(p) for p in hosts[granted_hosts:] + viewers[granted_viewers:]}
+    candidates = [p for p in request.participants if id(p) not in throttled]
+    
+    # Admit the rest of the batch in one atomic step
+    try:
+        admissions = iter(await state_store.admit_many(
+            room_name, [p.participant_name for p in candidates]
+        ))
+    except Exception as e:
+        raise http_error(e, 400, "Failed to join room")
+    
+    admitted = []
+    results = []
+    for participant in request.participants:
+        if id(participant) in throttled:
+            error = "Too many joins, try again later"
+        elif next(admissions):
+            admitted.append(participant)
+            results.append(None)
+            continue
+        else:
+            error = "Room is full"
+        results.append({
+            "participant_name": participant.participant_name,
+            "success": False,
+            "error": error
+        })
+    
+    try:
+        node = await node_router.locate(room_name, room_config.get("node"))
+        grants = [build_grants(room_name, p.is_host) for p in admitted]
+        with TOKEN_MINT_LATENCY.time(mode="bulk"):
+            tokens = await token_minter.mint_many([
+                (p.participant_name, p.participant_name, g) for p, g in zip(admitted, grants)
+            ], credentials=node.credentials)
+    except Exception as e:
+        raise http_error(e, 400, "Failed to join room")
+    
+    # Fill the admitted slots in request order
+    minted = iter(zip(admitted, grants, tokens))
+    for index, result in enumerate(results):
+        if result is None:
+            participant, video_grants, jwt_token = next(minted)
+            results[index] = {
+                "participant_name": participant.participant_name,
+                "success": True,
+                "token": jwt_token,
+                "permissions": video_grants
+            }
+    
+    return {
+        "success": len(admitted) == len(request.participants),
+        "admitted": len(admitted),
+        "url": node.url,
+        "room_name": room_name,
+        "participants": results
+    }
+
+def encode_cursor(room_name: str) -> str:
+    """Opaque pagination cursor pointing just after a room"""
+    return base64.urlsafe_b64encode(room_name.encode()).decode()
+
+def decode_cursor(cursor: str) -> str:
+    """Room name a pagination cursor points after"""
+    try:
+        return base64.b64decode(cursor.encode(), altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def room_info_json(room, room_data: Dict) -> bytes:
+    """Serialized RoomInfo of a room, reused until the room or its config changes"""
+    max_participants = room_data.get("max_participants", 100)
+    created_at = room_data.get("created_at")
+    version = (room_cache.room_version(room.name), max_participants, created_at)
+    
+    # Without a stored config the creation time below is made up, so keep it out of the cache
+    cacheable = version[0] is not None and created_at is not None
+    body = room_fragments.get(room.name, version) if cacheable else None
+    if body is None:
+        body = orjson.dumps({
+            "name": room.name,
+            "sid": room.sid,
+            "num_participants": room.num_participants,
+            "max_participants": max_participants,
+            "creation_time": created_at or datetime.now().isoformat(),
+            "metadata": room.metadata
+        })
+        if cacheable:
+            room_fragments.put(room.name, version, body)
+    return body
+
+def cached_response(request: Request, entry, headers: Optional[Dict] = None) -> Response:
+    """Serve a cached (etag, body) pair, or 304 if the client already has it"""
+    etag, body = entry
+    headers = {**(headers or {}), "ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+async def stream_room_infos(rooms):
+    """Serialize rooms to NDJSON one at a time, loading configs in chunks"""
+    rooms = iter(rooms)
+    while True:
+        chunk = list(islice(rooms, ROOMS_STREAM_CHUNK))
+        if not chunk:
+            return
+        room_configs = await state_store.get_rooms([room.name for room in chunk])
+        for room in chunk:
+            yield room_info_json(room, room_configs.get(room.name, {})) + b"\n"
 
 @app.get("/rooms", response_model=List[RoomInfo])
-async def list_rooms():
-    """List all active rooms"""
+async def list_rooms(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=ROOMS_PAGE_MAX),
+    cursor: Optional[str] = None,
+    prefix: str = "",
+    min_participants: int = 0,
+    output_format: Optional[str] = Query(None, alias="format"),
+):
+    """List all active rooms, optionally paginated, filtered or streamed as NDJSON"""
+    after = decode_cursor(cursor) if cursor else None
+    ndjson = output_format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", "")
+    
     try:
-        # Create the request object for listing rooms
-        list_request = room_proto.ListRoomsRequest()
-        rooms_response = await livekit_api.room.list_rooms(list_request)
+        rooms = (
+            room for room in await room_cache.rooms_after(after, prefix)
+            if room.num_participants >= min_participants
+        )
         
-        room_list = []
-        for room in rooms_response.rooms:
-            room_data = active_rooms.get(room.name, {})
-            room_list.append(RoomInfo(
-                name=room.name,
-                sid=room.sid,
-                num_participants=room.num_participants,
-                max_participants=room_data.get("max_participants", 100),
-                creation_time=room_data.get("created_at", datetime.now()),
-                metadata=room.metadata
-            ))
+        # Unchanged rooms and configs mean an unchanged body: reuse it, or answer 304
+        cache_key = ("rooms", after, prefix, min_participants, limit)
+        version = (room_cache.version, await state_store.config_version())
+        stale = staleness_headers(room_cache.staleness)
+        if not ndjson:
+            cached = response_cache.get(cache_key, version)
+            if cached is not None:
+                etag, body, headers = cached
+                return cached_response(request, (etag, body), {**headers, **stale})
+        
+        headers = {}
+        if limit:
+            # Only references are collected here, serialization stays lazy
+            page = list(islice(rooms, limit))
+            if page and next(rooms, None) is not None:
+                headers["X-Next-Cursor"] = encode_cursor(page[-1].name)
+            rooms = page
         
-        return room_list
+        if ndjson:
+            return StreamingResponse(
+                stream_room_infos(rooms),
+                media_type="application/x-ndjson",
+                headers={**headers, **stale},
+            )
+        
+        rooms = list(rooms)
+        if limit:
+            room_configs = await state_store.get_rooms([room.name for room in rooms])
+        else:
+            room_configs = await state_store.list_rooms()
+        
+        body = b"[" + b",".join(
+            room_info_json(room, room_configs.get(room.name, {})) for room in rooms
+        ) + b"]"
+        etag = make_etag(body)
+        response_cache.put(cache_key, version, (etag, body, headers))
+        return cached_response(request, (etag, body), {**headers, **stale})
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list rooms: {str(e)}")
+        raise http_error(e, 500, "Failed to list rooms")
+
+async def get_participants(room_name: str, track: bool = True):
+    """Get a room's participants, from webhook-maintained state when available.
+
+    Pass ``track=False`` while it is not yet known that the room exists, so a
+    missing room does not start being tracked.
+    """
+    participants = room_cache.participants(room_name)
+    if participants is None:
+        participants_request = room_proto.ListParticipantsRequest(room=room_name)
+        participants_response = await room_service.list_participants(participants_request)
+        participants = list(participants_response.participants)
+        if track and TRACK_PARTICIPANTS:
+            room_cache.set_participants(room_name, participants)
+    return participants
+
+def format_room_info(room, participants, room_data: Dict) -> Dict:
+    """Build the detailed room payload returned by the room info endpoints"""
+    participant_list = []
+    for p in participants:
+        participant_list.append({
+            "identity": p.identity,
+            "name": p.name,
+            "joined_at": datetime.fromtimestamp(p.joined_at / 1000).isoformat(),
+            "is_publisher": len(p.tracks) > 0,
+            "track_count": len(p.tracks)
+        })
+    
+    return {
+        "room": {
+            "name": room.name,
+            "sid": room.sid,
+            "num_participants": room.num_participants,
+            "max_participants": room_data.get("max_participants", 100),
+            "creation_time": room.creation_time,
+            "metadata": room.metadata
+        },
+        "participants": participant_list
+    }
+
+def participants_fingerprint(participants) -> int:
+    """Cheap identity of the participant fields in the room info payload"""
+    return hash(tuple((p.identity, p.name, p.joined_at, len(p.tracks)) for p in participants))
 
 @app.get("/rooms/{room_name}")
-async def get_room_info(room_name: str):
+async def get_room_info(room_name: str, request: Request):
     """Get detailed information about a specific room"""
     try:
-        list_request = room_proto.ListRoomsRequest()
-        rooms_response = await livekit_api.room.list_rooms(list_request)
-        room = next((r for r in rooms_response.rooms if r.name == room_name), None)
+        # Fetch the room and its participants concurrently
+        room, participants, room_data = await asyncio.gather(
+            room_cache.get_room(room_name),
+            get_participants(room_name, track=False),
+            state_store.get_room(room_name),
+            return_exceptions=True,
+        )
         
+        if isinstance(room, Exception):
+            raise room
+        if isinstance(room_data, Exception):
+            raise room_data
+        if not room and room_data:
+            # Created by another worker since this one's snapshot was taken
+            room = await room_cache.get_room(room_name, lookup=True)
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
+        if isinstance(participants, Exception):
+            raise participants
+        if TRACK_PARTICIPANTS and room_cache.participants(room_name) is None:
+            room_cache.set_participants(room_name, participants)
         
-        # Get participants
-        participants_request = room_proto.ListParticipantsRequest(room=room_name)
-        participants_response = await livekit_api.room.list_participants(participants_request)
-        
-        participant_list = []
-        for p in participants_response.participants:
-            participant_list.append({
-                "identity": p.identity,
-                "name": p.name,
-                "joined_at": datetime.fromtimestamp(p.joined_at / 1000).isoformat(),
-                "is_publisher": len(p.tracks) > 0,
-                "track_count": len(p.tracks)
-            })
-        
-        room_data = active_rooms.get(room_name, {})
+        room_data = room_data or {}
+        # Webhook-tracked participants carry a version, fetched ones are compared
+        participants_version = room_cache.participants_version(room_name)
+        if participants_version is None:
+            participants_version = participants_fingerprint(participants)
+        version = (
+            room_cache.room_version(room_name),
+            participants_version,
+            room_data.get("max_participants"),
+        )
         
-        return {
-            "room": {
-                "name": room.name,
-                "sid": room.sid,
-                "num_participants": room.num_participants,
-                "max_participants": room_data.get("max_participants", 100),
-                "creation_time": room.creation_time,
-                "metadata": room.metadata
-            },
-            "participants": participant_list
-        }
+        cache_key = ("room", room_name)
+        entry = response_cache.get(cache_key, version) if version[0] is not None else None
+        if entry is None:
+            body = orjson.dumps(format_room_info(room, participants, room_data))
+            entry = response_cache.put(cache_key, version, (make_etag(body), body))
+        return cached_response(request, entry, staleness_headers(room_cache.staleness))
     
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get room info: {str(e)}")
+        # Last-known-good body while LiveKit is failing
+        stale = response_cache.peek(("room", room_name)) if is_upstream_failure(e) else None
+        if stale is not None and stale[1] <= STALE_MAX_AGE:
+            entry, age = stale
+            return cached_response(request, entry, staleness_headers(age))
+        raise http_error(e, 500, "Failed to get room info")
+
+@app.get("/rooms/{room_name}/stats")
+async def get_room_stats(
+    room_name: str,
+    window: int = Query(3600, ge=1),
+    series: bool = False,
+):
+    """Peak, average and percentile occupancy of a room over a time window"""
+    stats = occupancy_store.stats(room_name, window, include_series=series)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No occupancy data for room")
+    return stats
+
+@app.post("/rooms/info:batch")
+async def batch_room_info(request: BatchRoomInfoRequest, response: Response):
+    """Get detailed information about many rooms at once"""
+    names = list(dict.fromkeys(request.names))
+    
+    try:
+        # One targeted ListRooms call for every requested name
+        rooms, room_configs = await asyncio.gather(
+            room_cache.get_rooms(names),
+            state_store.get_rooms(names),
+        )
+        # Rooms created by another worker since this one's snapshot was taken
+        unseen = [name for name in names if name not in rooms and name in room_configs]
+        if unseen:
+            rooms.update(await room_cache.get_rooms(unseen, lookup=True))
+    except Exception as e:
+        raise http_error(e, 500, "Failed to get room info")
+    response.headers.update(staleness_headers(room_cache.staleness))
+    
+    async def fetch_info(room_name: str):
+        participants = await get_participants(room_name)
+        return format_room_info(rooms[room_name], participants, room_configs.get(room_name, {}))
+    
+    # Fan out participant lookups under a concurrency limit
+    found = [name for name in names if name in rooms]
+    results = await gather_bounded(fetch_info, found, ROOM_INFO_BATCH_CONCURRENCY)
+    
+    room_infos = {}
+    errors = {}
+    for name, result in zip(found, results):
+        if isinstance(result, Exception):
+            errors[name] = str(result)
+        else:
+            room_infos[name] = result
+    
+    return {
+        "rooms": room_infos,
+        "not_found": [name for name in names if name not in rooms],
+        "errors": errors
+    }
 
 @app.delete("/rooms/{room_name}")
 async def delete_room(room_name: str):
     """Delete a room and disconnect all participants"""
     try:
         delete_request = room_proto.DeleteRoomRequest(room=room_name)
-        await livekit_api.room.delete_room(delete_request)
+        await room_service.delete_room(delete_request)
+        room_cache.remove_room(room_name)
         
         # Clean up local storage
-        if room_name in active_rooms:
-            del active_rooms[room_name]
-        if room_name in room_participants:
-            del room_participants[room_name]
+        await state_store.delete_room(room_name)
         
         return {"success": True, "message": f"Room {room_name} deleted successfully"}
     
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to delete room: {str(e)}")
+        raise http_error(e, 400, "Failed to delete room")
 
 @app.post("/rooms/{room_name}/participants/{participant_identity}/kick")
 async def kick_participant(room_name: str, participant_identity: str):
@@ -263,66 +971,235 @@ async def kick_participant(room_name: str, participant_identity: str):
         # --------------------------------------------------
 
         # Hàm remove_participant của bạn mong muốn nhận đối tượng này
-        await livekit_api.room.remove_participant(remove_request)
+        await room_service.remove_participant(remove_request)
         
         # Update local storage
-        if room_name in room_participants:
-            room_participants[room_name] = [
-                p for p in room_participants[room_name] 
-                if p != participant_identity
-            ]
+        room_cache.remove_participant(room_name, participant_identity)
+        await state_store.remove_participant(room_name, participant_identity)
         
         return {"success": True, "message": f"Participant {participant_identity} removed"}
     
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to kick participant: {str(e)}")
+        raise http_error(e, 400, "Failed to kick participant")
 
-@app.post("/rooms/{room_name}/participants/{participant_identity}/mute")
-async def mute_participant(room_name: str, participant_identity: str, mute_audio: bool = True):
-    """Mute/unmute a participant"""
-    try:
+async def set_tracks_muted(room_name: str, identity: str, track_sids: List[str], muted: bool):
+    """Mute or unmute specific published tracks of a participant"""
+    for track_sid in track_sids:
         mute_request = room_proto.MuteRoomTrackRequest(
             room=room_name,
-            identity=participant_identity,
-            track_sid="",  # Empty for all tracks
-            muted=mute_audio
+            identity=identity,
+            track_sid=track_sid,
+            muted=muted
         )
-        await livekit_api.room.mute_published_track(mute_request)
+        await room_service.mute_published_track(mute_request)
+
+def tracks_of_types(participant, track_types: Optional[List[str]]) -> List[str]:
+    """SIDs of a participant's published tracks, optionally limited to types"""
+    if track_types is None:
+        return [track.sid for track in participant.tracks]
+    wanted = {proto.models.TrackType.Value(t.upper()) for t in track_types}
+    return [track.sid for track in participant.tracks if track.type in wanted]
+
+@app.post("/rooms/{room_name}/participants/{participant_identity}/mute")
+async def mute_participant(room_name: str, participant_identity: str, mute_audio: bool = True,
+                           track_sid: Optional[str] = None):
+    """Mute/unmute a participant's audio tracks, or one specific track"""
+    try:
+        if track_sid:
+            track_sids = [track_sid]
+        else:
+            participant = await room_service.get_participant(room_proto.RoomParticipantIdentity(
+                room=room_name,
+                identity=participant_identity
+            ))
+            track_sids = tracks_of_types(participant, ["audio"])
+            if not track_sids:
+                raise HTTPException(status_code=404, detail="Participant has no audio tracks")
+        
+        await set_tracks_muted(room_name, participant_identity, track_sids, mute_audio)
         
         action = "muted" if mute_audio else "unmuted"
-        return {"success": True, "message": f"Participant {participant_identity} {action}"}
+        return {
+            "success": True,
+            "message": f"Participant {participant_identity} {action}",
+            "tracks": track_sids
+        }
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e, 400, "Failed to mute participant")
+
+async def select_moderation_targets(room_name: str, request: BulkModerationRequest):
+    """Resolve a bulk moderation request to participants, plus unknown identities"""
+    if not request.identities and not request.all_except_hosts:
+        raise HTTPException(status_code=400, detail="Specify identities or all_except_hosts")
+    
+    # Fresh listing, moderation needs the current track SIDs
+    participants_request = room_proto.ListParticipantsRequest(room=room_name)
+    participants_response = await room_service.list_participants(participants_request)
+    participants = {p.identity: p for p in participants_response.participants}
+    
+    if request.all_except_hosts:
+        # Hosts are the participants allowed to publish
+        targets = [p for p in participants.values() if not p.permission.can_publish]
+        not_found = []
+    else:
+        identities = list(dict.fromkeys(request.identities))
+        targets = [participants[i] for i in identities if i in participants]
+        not_found = [i for i in identities if i not in participants]
+    return targets, not_found
+
+def moderation_response(targets, outcomes, not_found: List[str], extra=None) -> Dict:
+    """Per-identity results of a bulk moderation request"""
+    results = []
+    for participant, outcome in zip(targets, outcomes):
+        if isinstance(outcome, Exception):
+            results.append({"identity": participant.identity, "success": False, "error": str(outcome)})
+        else:
+            results.append({"identity": participant.identity, "success": True, **(extra(outcome) if extra else {})})
+    for identity in not_found:
+        results.append({"identity": identity, "success": False, "error": "Participant not found"})
+    
+    succeeded = sum(1 for result in results if result["success"])
+    return {"success": succeeded == len(results), "affected": succeeded, "results": results}
+
+@app.post("/rooms/{room_name}/participants:mute")
+async def bulk_mute_participants(room_name: str, request: BulkMuteRequest):
+    """Mute/unmute the tracks of many participants, or everyone except the hosts"""
+    try:
+        targets, not_found = await select_moderation_targets(room_name, request)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to mute participant: {str(e)}")
+        raise http_error(e, 400, "Failed to mute participants")
+    
+    track_sids = {p.identity: tracks_of_types(p, request.track_types) for p in targets}
+    concurrency = min(request.concurrency or MODERATION_CONCURRENCY, BULK_MAX_CONCURRENCY)
+    
+    # Every track of every participant is its own upstream call
+    calls = [(p.identity, sid) for p in targets for sid in track_sids[p.identity]]
+    
+    async def mute_track(call):
+        identity, sid = call
+        await set_tracks_muted(room_name, identity, [sid], request.muted)
+    
+    call_outcomes = dict(zip(calls, await gather_bounded(mute_track, calls, concurrency)))
+    
+    outcomes = []
+    for p in targets:
+        errors = [
+            call_outcomes[(p.identity, sid)] for sid in track_sids[p.identity]
+            if isinstance(call_outcomes[(p.identity, sid)], Exception)
+        ]
+        outcomes.append(errors[0] if errors else track_sids[p.identity])
+    
+    return moderation_response(targets, outcomes, not_found, lambda sids: {"tracks": sids})
+
+@app.post("/rooms/{room_name}/participants:kick")
+async def bulk_kick_participants(room_name: str, request: BulkModerationRequest):
+    """Remove many participants, or everyone except the hosts"""
+    try:
+        targets, not_found = await select_moderation_targets(room_name, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e, 400, "Failed to kick participants")
+    
+    concurrency = min(request.concurrency or MODERATION_CONCURRENCY, BULK_MAX_CONCURRENCY)
+    
+    async def kick(participant):
+        await room_service.remove_participant(room_proto.RoomParticipantIdentity(
+            room=room_name,
+            identity=participant.identity
+        ))
+        room_cache.remove_participant(room_name, participant.identity)
+        await state_store.remove_participant(room_name, participant.identity)
+    
+    outcomes = await gather_bounded(kick, targets, concurrency)
+    return moderation_response(targets, outcomes, not_found)
+
+def receive_webhook(body: str, auth_token: str) -> proto.webhook.WebhookEvent:
+    """Verify a webhook against each node's credentials in turn"""
+    error = None
+    for receiver in webhook_receivers:
+        try:
+            return receiver.receive(body, auth_token)
+        except Exception as e:
+            error = e
+    raise error or ValueError("No webhook credentials configured")
+
+@app.post("/webhooks/livekit")
+async def livekit_webhook(request: Request):
+    """Receive LiveKit webhook events and apply them to local room state"""
+    body = (await request.body()).decode()
+    auth_token = request.headers.get("Authorization", "")
+    if auth_token.startswith("Bearer "):
+        auth_token = auth_token[len("Bearer "):]
+    
+    try:
+        event = receive_webhook(body, auth_token)
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Invalid webhook: {str(e)}")
+    
+    await apply_webhook_event(event)
+    return {"success": True}
+
+async def apply_webhook_event(event: proto.webhook.WebhookEvent):
+    """Apply a single webhook event as an incremental state update"""
+    room_name = event.room.name
+    
+    if event.event == "room_started":
+        room_cache.update_room(event.room)
+        # Joins reserved before LiveKit started the room keep their slots,
+        # and a participant_joined delivered out of order is not lost
+        if TRACK_PARTICIPANTS and room_cache.participants(room_name) is None:
+            room_cache.set_participants(room_name, [])
+    
+    elif event.event == "room_finished":
+        room_cache.remove_room(room_name)
+        await state_store.clear_participants(room_name)
+    
+    elif event.event == "participant_joined":
+        room_cache.update_participant(room_name, event.participant)
+        await state_store.add_participant(room_name, event.participant.identity)
+    
+    elif event.event == "participant_left":
+        room_cache.remove_participant(room_name, event.participant.identity)
+        await state_store.remove_participant(room_name, event.participant.identity)
+    
+    elif event.event == "track_published":
+        participant = proto.models.ParticipantInfo()
+        participant.CopyFrom(event.participant)
+        if not any(t.sid == event.track.sid for t in participant.tracks):
+            participant.tracks.append(event.track)
+        room_cache.update_participant(room_name, participant)
+    
+    else:
+        return
+    
+    # Push the change to websocket subscribers straight away
+    room = room_cache.peek_room(room_name)
+    if room:
+        room_hub.publish(room)
 
 @app.websocket("/ws/rooms/{room_name}")
 async def websocket_endpoint(websocket: WebSocket, room_name: str):
     """WebSocket endpoint for real-time room updates"""
     await websocket.accept()
+    subscriber = room_hub.subscribe(room_name, websocket)
     
     try:
+        # Updates are pushed by the hub; reading here notices disconnects
         while True:
-            # Send periodic room updates
-            list_request = room_proto.ListRoomsRequest()
-            rooms_response = await livekit_api.room.list_rooms(list_request)
-            room = next((r for r in rooms_response.rooms if r.name == room_name), None)
-            
-            if room:
-                await websocket.send_json({
-                    "type": "room_update",
-                    "data": {
-                        "name": room.name,
-                        "num_participants": room.num_participants,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                })
-            
-            await asyncio.sleep(5)  # Update every 5 seconds
+            await websocket.receive_text()
     
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        await websocket.close()
+        await room_hub.unsubscribe(subscriber)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,462 @@
+"""
+Paced media feeders for publishing synthetic tracks on the LiveKit Streaming Platform
+"""
+import asyncio
+import collections
+import struct
+import time
+from typing import AsyncIterable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from livekit import rtc
+
+FrameLike = Union[np.ndarray, bytes, bytearray, memoryview]
+FrameSource = Union[Iterable[FrameLike], AsyncIterable[FrameLike]]
+AudioInput = Union[np.ndarray, Iterable[np.ndarray], AsyncIterable[np.ndarray]]
+
+AUDIO_FRAME_MS = 10
+
+
+def video_frame_size(width: int, height: int, buffer_type: int) -> int:
+    """Bytes needed for one frame of the given format"""
+    chroma_w, chroma_h = (width + 1) // 2, (height + 1) // 2
+    if buffer_type in (rtc.VideoBufferType.RGBA, rtc.VideoBufferType.BGRA,
+                       rtc.VideoBufferType.ARGB, rtc.VideoBufferType.ABGR):
+        return width * height * 4
+    if buffer_type == rtc.VideoBufferType.RGB24:
+        return width * height * 3
+    if buffer_type in (rtc.VideoBufferType.I420, rtc.VideoBufferType.NV12):
+        return width * height + 2 * chroma_w * chroma_h
+    if buffer_type == rtc.VideoBufferType.I422:
+        return width * height + 2 * chroma_w * height
+    if buffer_type == rtc.VideoBufferType.I444:
+        return width * height * 3
+    raise ValueError(f"Unsupported video buffer type: {buffer_type}")
+
+
+def array_frames(frames: np.ndarray, loop: bool = True) -> Iterator[np.ndarray]:
+    """Yield views of the frames along the first axis of an array"""
+    while True:
+        for frame in frames:
+            yield frame
+        if not loop:
+            return
+
+
+def raw_video_file(path: str, width: int, height: int,
+                   buffer_type: int = rtc.VideoBufferType.I420, loop: bool = True) -> Iterator[np.ndarray]:
+    """Yield frames of a raw YUV/RGBA file through a read-only memory map"""
+    frame_size = video_frame_size(width, height, buffer_type)
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    frame_count = len(data) // frame_size
+    if frame_count == 0:
+        raise ValueError(f"{path} is smaller than one {width}x{height} frame")
+    return array_frames(data[:frame_count * frame_size].reshape(frame_count, frame_size), loop)
+
+
+class VideoFramePool:
+    """Preallocated frames reused round-robin instead of one allocation per frame"""
+
+    def __init__(self, width: int, height: int, buffer_type: int = rtc.VideoBufferType.RGBA, size: int = 3):
+        self.frame_size = video_frame_size(width, height, buffer_type)
+        self.frames = [
+            rtc.VideoFrame(width, height, buffer_type, bytearray(self.frame_size))
+            for _ in range(size)
+        ]
+        # uint8 views over each frame's own buffer
+        self.buffers = [np.frombuffer(frame.data, dtype=np.uint8) for frame in self.frames]
+        self._next = 0
+
+    def fill(self, data: FrameLike) -> rtc.VideoFrame:
+        """Copy source pixels into the next pooled frame"""
+        index = self._next
+        self._next = (index + 1) % len(self.frames)
+        source = data.reshape(-1) if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.uint8)
+        if source.nbytes != self.frame_size:
+            raise ValueError(f"Frame has {source.nbytes} bytes, expected {self.frame_size}")
+        np.copyto(self.buffers[index], source.view(np.uint8), casting="no")
+        return self.frames[index]
+
+
+_DONE = object()
+
+
+async def _next_item(iterator):
+    """Next item of a sync or async iterator, or _DONE when exhausted"""
+    if hasattr(iterator, "__anext__"):
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return _DONE
+    return next(iterator, _DONE)
+
+
+def _iterate(source: FrameSource):
+    if hasattr(source, "__aiter__"):
+        return source.__aiter__()
+    return iter(source)
+
+
+class _TimingStats:
+    """Running average and maximum of a duration, in seconds"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def as_ms(self, prefix: str) -> Dict[str, float]:
+        average = self.total / self.count if self.count else 0.0
+        return {f"{prefix}_avg_ms": round(average * 1000, 3), f"{prefix}_max_ms": round(self.max * 1000, 3)}
+
+
+class VideoFeeder:
+    """Feeds a VideoSource at a fixed frame rate.
+
+    Frames are scheduled against an absolute clock, so sleep overshoot does
+    not accumulate. When the producer or the event loop falls behind by more
+    than a frame, the missed slots are dropped rather than sent late.
+    """
+
+    def __init__(self, source: rtc.VideoSource, width: int, height: int, fps: float = 30.0,
+                 buffer_type: int = rtc.VideoBufferType.RGBA, pool_size: int = 3):
+        self.source = source
+        self.fps = fps
+        self.pool = VideoFramePool(width, height, buffer_type, pool_size)
+
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._lateness = _TimingStats()
+        self._capture = _TimingStats()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            **self._lateness.as_ms("late"),
+            **self._capture.as_ms("capture"),
+        }
+
+    async def run(self, frames: FrameSource, max_frames: Optional[int] = None):
+        """Send frames until the source is exhausted or max_frames were sent"""
+        iterator = _iterate(frames)
+        interval = 1.0 / self.fps
+        start = time.monotonic()
+        slot = 0
+
+        while max_frames is None or self.frames_sent < max_frames:
+            data = await _next_item(iterator)
+            if data is _DONE:
+                return
+
+            now = time.monotonic()
+            due = start + slot * interval
+            if now - due >= interval:
+                # Behind schedule: give up the missed slots and send this
+                # frame in the current one instead of queueing up latency
+                current = int((now - start) / interval)
+                self.frames_dropped += current - slot
+                slot = current
+                due = start + slot * interval
+
+            if due > now:
+                await asyncio.sleep(due - now)
+            self._lateness.observe(max(0.0, time.monotonic() - due))
+
+            captured = time.perf_counter()
+            frame = self.pool.fill(data)
+            self.source.capture_frame(frame, timestamp_us=int(slot * interval * 1_000_000))
+            self._capture.observe(time.perf_counter() - captured)
+
+            self.frames_sent += 1
+            slot += 1
+
+    def start(self, frames: FrameSource, max_frames: Optional[int] = None) -> asyncio.Task:
+        """Run the feeder in the background"""
+        self._task = asyncio.create_task(self.run(frames, max_frames))
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """Memory-map the samples of a 16-bit PCM WAV file as (samples, channels)"""
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(chunk_size - 16 + (chunk_size & 1), 1)
+            elif chunk_id == b"data":
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+
+    if fmt is None:
+        raise ValueError(f"{path} has no fmt chunk")
+    audio_format, channels, sample_rate, _, _, bits = fmt
+    if audio_format != 1 or bits != 16:
+        raise ValueError(f"{path} is not 16-bit PCM")
+
+    frames = chunk_size // (2 * channels)
+    samples = np.memmap(path, dtype="<i2", mode="r", offset=data_offset, shape=(frames, channels))
+    return samples, sample_rate
+
+
+def _as_2d(samples: np.ndarray) -> np.ndarray:
+    return samples.reshape(-1, 1) if samples.ndim == 1 else samples
+
+
+def array_chunks(samples: np.ndarray, chunk: int) -> Iterator[np.ndarray]:
+    """Yield consecutive views of a sample array"""
+    samples = _as_2d(samples)
+    for start in range(0, len(samples), chunk):
+        yield samples[start:start + chunk]
+
+
+class AudioConverter:
+    """Streaming channel remix and linear resampling of int16 audio chunks"""
+
+    def __init__(self, in_rate: int, in_channels: int, out_rate: int, out_channels: int):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.passthrough = in_rate == out_rate and in_channels == out_channels
+
+        if in_channels == out_channels:
+            self._mix = None
+        elif in_channels == 1:
+            self._mix = np.ones((1, out_channels), dtype=np.float32)
+        elif out_channels == 1:
+            self._mix = np.full((in_channels, 1), 1.0 / in_channels, dtype=np.float32)
+        else:
+            self._mix = np.eye(in_channels, out_channels, dtype=np.float32)
+
+        self._step = in_rate / out_rate
+        # Resampling state: previous input sample and the position of the
+        # next output sample, where 0 is the previous sample
+        self._prev = np.zeros(out_channels, dtype=np.float32)
+        self._position = 1.0
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        chunk = _as_2d(chunk)
+        if self.passthrough:
+            return chunk
+
+        mixed = chunk.astype(np.float32)
+        if self._mix is not None:
+            mixed = mixed @ self._mix
+        if self.in_rate == self.out_rate:
+            return np.clip(mixed, -32768, 32767).astype(np.int16)
+
+        x = np.concatenate((self._prev[None, :], mixed))
+        end = len(x) - 1
+        count = max(0, int(np.ceil((end - self._position) / self._step)))
+        positions = self._position + np.arange(count) * self._step
+        index = positions.astype(np.int64)
+        fraction = (positions - index)[:, None].astype(np.float32)
+        out = x[index] * (1 - fraction) + x[np.minimum(index + 1, end)] * fraction
+
+        self._position += count * self._step - end
+        self._prev = x[-1]
+        return np.clip(out, -32768, 32767).astype(np.int16)
+
+
+class AudioPump:
+    """Feeds an AudioSource exact 10 ms frames on a steady clock.
+
+    Input is converted in chunks to the source's rate and channel count and
+    buffered as a queue of arrays; each tick copies one frame's worth into a
+    preallocated AudioFrame. If the input cannot keep up, silence is sent so
+    the capture clock never stalls.
+    """
+
+    def __init__(self, source: rtc.AudioSource, buffer_ms: int = 200, max_lag: float = 0.1):
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.num_channels = source.num_channels
+        self.samples_per_frame = self.sample_rate * AUDIO_FRAME_MS // 1000
+        self.buffer_samples = self.sample_rate * buffer_ms // 1000
+        self.max_lag = max_lag
+
+        self._frames = [
+            rtc.AudioFrame.create(self.sample_rate, self.num_channels, self.samples_per_frame)
+            for _ in range(2)
+        ]
+        self._buffers = [
+            np.frombuffer(frame.data, dtype=np.int16).reshape(self.samples_per_frame, self.num_channels)
+            for frame in self._frames
+        ]
+        self._silence = rtc.AudioFrame.create(self.sample_rate, self.num_channels, self.samples_per_frame)
+
+        self._chunks: collections.deque = collections.deque()
+        self._offset = 0
+        self._buffered = 0
+        self._space = asyncio.Event()
+        self._primed = asyncio.Event()
+        self._exhausted = False
+
+        self.frames_sent = 0
+        self.underruns = 0
+        self.clock_resets = 0
+        self._lateness = _TimingStats()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        return {
+            "frames_sent": self.frames_sent,
+            "underruns": self.underruns,
+            "clock_resets": self.clock_resets,
+            "buffered_ms": round(self._buffered * 1000 / self.sample_rate, 1),
+            **self._lateness.as_ms("late"),
+        }
+
+    async def _produce(self, chunks, sample_rate: int, num_channels: Optional[int]):
+        try:
+            await self._convert_chunks(chunks, sample_rate, num_channels)
+        finally:
+            self._exhausted = True
+            self._primed.set()
+
+    async def _convert_chunks(self, chunks, sample_rate: int, num_channels: Optional[int]):
+        iterator = _iterate(chunks)
+        converter = None
+        if num_channels is not None:
+            converter = AudioConverter(sample_rate, num_channels, self.sample_rate, self.num_channels)
+
+        while True:
+            chunk = await _next_item(iterator)
+            if chunk is _DONE:
+                break
+            if not isinstance(chunk, np.ndarray):
+                if num_channels is None:
+                    raise ValueError("num_channels is required for raw PCM chunks")
+                chunk = np.frombuffer(chunk, dtype=np.int16).reshape(-1, num_channels)
+            if converter is None:
+                converter = AudioConverter(sample_rate, _as_2d(chunk).shape[1], self.sample_rate, self.num_channels)
+
+            converted = converter.process(chunk)
+            if len(converted):
+                self._chunks.append(converted)
+                self._buffered += len(converted)
+                if self._buffered >= self.samples_per_frame:
+                    self._primed.set()
+
+            while self._buffered >= self.buffer_samples:
+                self._space.clear()
+                await self._space.wait()
+
+    def _fill(self, buffer: np.ndarray) -> int:
+        """Copy up to one frame from the queued chunks, returning samples copied"""
+        filled = 0
+        while filled < len(buffer) and self._chunks:
+            chunk = self._chunks[0]
+            take = min(len(buffer) - filled, len(chunk) - self._offset)
+            buffer[filled:filled + take] = chunk[self._offset:self._offset + take]
+            filled += take
+            self._offset += take
+            if self._offset == len(chunk):
+                self._chunks.popleft()
+                self._offset = 0
+        self._buffered -= filled
+        self._space.set()
+        return filled
+
+    async def run(self, samples: AudioInput, sample_rate: int, num_channels: Optional[int] = None):
+        """Play samples at their own rate, converted to the source's format.
+
+        ``samples`` is an int16 array shaped (samples,) or (samples, channels),
+        e.g. from read_wav, or a sync/async iterable of such chunks. Raw bytes
+        chunks need ``num_channels``.
+        """
+        if isinstance(samples, np.ndarray):
+            num_channels = _as_2d(samples).shape[1]
+            # 100 ms views, read lazily from memory maps
+            samples = array_chunks(samples, max(1, sample_rate // 10))
+
+        self._chunks.clear()
+        self._offset = self._buffered = 0
+        self._exhausted = False
+        self._primed.clear()
+        producer = asyncio.create_task(self._produce(samples, sample_rate, num_channels))
+        # Start the clock once the first frame is ready
+        await self._primed.wait()
+        interval = AUDIO_FRAME_MS / 1000
+        start = time.monotonic()
+        tick = 0
+        try:
+            while True:
+                if producer.done() and producer.exception():
+                    raise producer.exception()
+
+                due = start + tick * interval
+                now = time.monotonic()
+                if now - due > self.max_lag:
+                    # The loop stalled; restart the clock rather than burst
+                    self.clock_resets += 1
+                    start, tick, due = now, 0, now
+                elif due > now:
+                    await asyncio.sleep(due - now)
+                self._lateness.observe(max(0.0, time.monotonic() - due))
+
+                index = self.frames_sent % 2
+                buffer = self._buffers[index]
+                filled = self._fill(buffer)
+                if filled == 0:
+                    if self._exhausted and not self._chunks:
+                        return
+                    self.underruns += 1
+                    await self.source.capture_frame(self._silence)
+                else:
+                    if filled < len(buffer):
+                        buffer[filled:] = 0
+                        if not self._exhausted:
+                            self.underruns += 1
+                    await self.source.capture_frame(self._frames[index])
+                    self.frames_sent += 1
+                tick += 1
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+    def start(self, samples: AudioInput, sample_rate: int,
+              num_channels: Optional[int] = None) -> asyncio.Task:
+        """Run the pump in the background"""
+        self._task = asyncio.create_task(self.run(samples, sample_rate, num_channels))
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,68 @@
+"""
+Room membership index for the LiveKit Streaming Platform
+"""
+import time
+from typing import Dict, Optional, Set
+
+
+class RoomMembership:
+    """Joined participants and pending reservations of one room.
+
+    A join request reserves a slot; the ``participant_joined`` webhook turns
+    the reservation into a member and ``participant_left`` frees it. Tokens
+    that are never used stop holding a slot once their reservation expires.
+    Every operation is O(1) amortized.
+    """
+
+    def __init__(self, capacity: int, reservation_ttl: float = 0.0):
+        self.capacity = capacity
+        self.reservation_ttl = reservation_ttl
+        self.members: Set[str] = set()
+        # identity -> expiry; with a fixed TTL insertion order is expiry order
+        self.reservations: Dict[str, Optional[float]] = {}
+
+    @property
+    def count(self) -> int:
+        return len(self.members) + len(self.reservations)
+
+    def expire(self, now: Optional[float] = None):
+        """Drop reservations whose tokens were never used"""
+        if self.reservation_ttl <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        while self.reservations:
+            identity, expires_at = next(iter(self.reservations.items()))
+            if expires_at is None or expires_at > now:
+                break
+            del self.reservations[identity]
+
+    def reserve(self, identity: str) -> bool:
+        """Check capacity and reserve a slot in one step"""
+        now = time.monotonic()
+        self.expire(now)
+        if identity in self.members:
+            return True
+
+        if identity in self.reservations:
+            del self.reservations[identity]
+        elif self.count >= self.capacity:
+            return False
+
+        # Re-inserting keeps the dict ordered by expiry
+        self.reservations[identity] = now + self.reservation_ttl if self.reservation_ttl > 0 else None
+        return True
+
+    def confirm(self, identity: str):
+        """Turn a reservation into a member once the participant connects"""
+        self.reservations.pop(identity, None)
+        self.members.add(identity)
+
+    def release(self, identity: str):
+        """Free a participant's slot"""
+        self.members.discard(identity)
+        self.reservations.pop(identity, None)
+
+    def clear(self):
+        """Free every slot"""
+        self.members.clear()
+        self.reservations.clear()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 
 class CreateRoomRequest(BaseModel):
@@ -9,11 +9,34 @@ class CreateRoomRequest(BaseModel):
     audio_enabled: bool = True
     video_enabled: bool = True
 
+class BulkCreateRoomsRequest(BaseModel):
+    rooms: List[CreateRoomRequest]
+    concurrency: Optional[int] = None
+
+class BulkDeleteRoomsRequest(BaseModel):
+    names: List[str]
+    concurrency: Optional[int] = None
+
 class JoinRoomRequest(BaseModel):
     participant_name: str
     is_host: bool = False
     permissions: Optional[Dict[str, bool]] = None
 
+class BulkJoinRoomRequest(BaseModel):
+    participants: List[JoinRoomRequest]
+
+class BatchRoomInfoRequest(BaseModel):
+    names: List[str]
+
+class BulkModerationRequest(BaseModel):
+    identities: Optional[List[str]] = None
+    all_except_hosts: bool = False
+    concurrency: Optional[int] = None
+
+class BulkMuteRequest(BulkModerationRequest):
+    muted: bool = True
+    track_types: Optional[List[Literal["audio", "video"]]] = None  # all tracks if unset
+
 class RoomInfo(BaseModel):
     name: str
     sid: str
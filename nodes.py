@@ -0,0 +1,250 @@
+"""
+Placement of rooms across several LiveKit deployments for the LiveKit Streaming Platform
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from livekit.protocol import room as room_proto
+
+from resilience import PartialListing
+
+PLACEMENT_HASH = "hash"
+PLACEMENT_LEAST_LOAD = "least_load"
+
+# Name of the node a room was placed on, as stored with the room
+NodeResolver = Callable[[str], Awaitable[Optional[str]]]
+
+
+class LiveKitNode:
+    """One LiveKit deployment that rooms can be placed on"""
+
+    def __init__(self, name: str, url: str, api_key: str, api_secret: str, weight: float = 1.0):
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.weight = weight
+        # Wired up on startup, once there is an event loop for the HTTP client
+        self.api = None
+        self.room_service = None
+        self.breaker = None
+
+    @property
+    def credentials(self) -> Tuple[str, str]:
+        return self.api_key, self.api_secret
+
+
+def load_nodes(config: Optional[str], url: str, api_key: str, api_secret: str) -> List[LiveKitNode]:
+    """Nodes from a JSON list (inline or a file path), or the single default deployment.
+
+    Each entry needs a ``url``; ``name``, ``api_key``, ``api_secret`` and
+    ``weight`` are optional, credentials defaulting to the global ones.
+    """
+    if not config:
+        return [LiveKitNode("default", url, api_key, api_secret)]
+
+    if not config.lstrip().startswith("["):
+        with open(config) as f:
+            config = f.read()
+    entries = json.loads(config)
+    if not entries:
+        raise ValueError("LiveKit node list is empty")
+
+    nodes = []
+    for index, entry in enumerate(entries):
+        nodes.append(LiveKitNode(
+            entry.get("name") or f"node-{index}",
+            entry["url"],
+            entry.get("api_key") or api_key,
+            entry.get("api_secret") or api_secret,
+            float(entry.get("weight", 1.0)),
+        ))
+    if len({node.name for node in nodes}) != len(nodes):
+        raise ValueError("LiveKit node names must be unique")
+    return nodes
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring with weighted virtual points per node"""
+
+    def __init__(self, nodes: List[LiveKitNode], points_per_node: int = 100):
+        ring = sorted(
+            (_hash(f"{node.name}#{i}"), node.name)
+            for node in nodes
+            for i in range(max(1, int(points_per_node * node.weight)))
+        )
+        self._hashes = [point for point, _ in ring]
+        self._names = [name for _, name in ring]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._names[index]
+
+
+class NodeRouter:
+    """RoomService facade that spreads rooms over several LiveKit nodes.
+
+    New rooms are placed by consistent hashing on the room name, or on the
+    node with the least load (participants plus rooms, per unit of weight).
+    The node a room was placed on is stored with it; ``resolve`` looks that
+    up for rooms this process has not seen yet, and as a last resort every
+    node is asked. Listing fans out to every node at once and merges the
+    results; if some nodes fail, the others' rooms come in a PartialListing.
+    """
+
+    def __init__(self, nodes: List[LiveKitNode], placement: str = PLACEMENT_HASH,
+                 resolve: Optional[NodeResolver] = None):
+        if placement not in (PLACEMENT_HASH, PLACEMENT_LEAST_LOAD):
+            raise ValueError(f"Unknown room placement: {placement}")
+        self.nodes: Dict[str, LiveKitNode] = {node.name: node for node in nodes}
+        self.placement = placement
+        self.ring = HashRing(nodes)
+        self.resolve = resolve
+        self.stale_nodes: Set[str] = set()
+        self._locations: Dict[str, str] = {}
+        self._load: Dict[str, int] = {name: 0 for name in self.nodes}
+        self._wrapped = {}
+
+    @property
+    def retry_count(self) -> int:
+        return sum(getattr(node.room_service, "retry_count", 0) for node in self.nodes.values())
+
+    @property
+    def stats(self) -> Dict[str, Dict]:
+        rooms: Dict[str, int] = {name: 0 for name in self.nodes}
+        for name in self._locations.values():
+            rooms[name] += 1
+        return {
+            name: {
+                "url": node.url,
+                "rooms": rooms[name],
+                "load": self._load[name],
+                "circuit": node.breaker.state if node.breaker else None,
+                "stale": name in self.stale_nodes,
+            }
+            for name, node in self.nodes.items()
+        }
+
+    def remember(self, room_name: str, node_name: Optional[str]) -> Optional[LiveKitNode]:
+        """Record where a room lives, as stored with its config"""
+        node = self.nodes.get(node_name) if node_name else None
+        if node is not None:
+            self._locations[room_name] = node.name
+        return node
+
+    async def locate(self, room_name: str, node_name: Optional[str] = None) -> LiveKitNode:
+        """Node a room lives on, given the node stored with it if the caller has it"""
+        node = self.remember(room_name, node_name)
+        if node is not None:
+            return node
+        name = self._locations.get(room_name)
+        if name is None and self.resolve is not None:
+            node = self.remember(room_name, await self.resolve(room_name))
+            if node is not None:
+                return node
+        if name is None and len(self.nodes) > 1:
+            # Listing by name records the location of whichever node has it
+            try:
+                await self.list_rooms(room_proto.ListRoomsRequest(names=[room_name]))
+            except PartialListing:
+                pass
+            name = self._locations.get(room_name)
+        if name is None:
+            # Nowhere to be found; the node it would be placed on answers not_found
+            name = self.ring.node_for(room_name)
+        return self.nodes[name]
+
+    def place(self, room_name: str) -> LiveKitNode:
+        """Node for a new room"""
+        name = self._locations.get(room_name)
+        if name is None:
+            if self.placement == PLACEMENT_HASH:
+                name = self.ring.node_for(room_name)
+            else:
+                name = min(self.nodes, key=lambda n: (self._load[n] / self.nodes[n].weight, n))
+        return self.nodes[name]
+
+    async def _list_node(self, node: LiveKitNode, request: room_proto.ListRoomsRequest):
+        response = await node.room_service.list_rooms(request)
+        rooms = list(response.rooms)
+        for room in rooms:
+            self._locations[room.name] = node.name
+        if not request.names:
+            # A full listing is authoritative for that node
+            listed = {room.name for room in rooms}
+            for room_name, location in list(self._locations.items()):
+                if location == node.name and room_name not in listed:
+                    del self._locations[room_name]
+            self._load[node.name] = sum(room.num_participants for room in rooms) + len(rooms)
+            self.stale_nodes.discard(node.name)
+        return rooms
+
+    async def list_rooms(self, request: room_proto.ListRoomsRequest) -> room_proto.ListRoomsResponse:
+        nodes = list(self.nodes.values())
+        if request.names and all(name in self._locations for name in request.names):
+            nodes = [self.nodes[name] for name in {self._locations[n] for n in request.names}]
+
+        results = await asyncio.gather(
+            *(self._list_node(node, request) for node in nodes), return_exceptions=True
+        )
+        rooms = []
+        failed = {}
+        for node, result in zip(nodes, results):
+            if isinstance(result, BaseException):
+                print(f"⚠️ Failed to list rooms on LiveKit node {node.name}: {result}")
+                failed[node.name] = result
+            else:
+                rooms.extend(result)
+        if not failed:
+            return room_proto.ListRoomsResponse(rooms=rooms)
+
+        self.stale_nodes.update(failed)
+        if len(failed) == len(nodes):
+            raise next(iter(failed.values()))
+        # Rooms not seen on a healthy node may be on a failed one
+        raise PartialListing(
+            rooms,
+            lambda name: self._locations.get(name) in failed or name not in self._locations,
+            next(iter(failed.values())),
+        )
+
+    async def create_room(self, request: room_proto.CreateRoomRequest,
+                          node: Optional[LiveKitNode] = None):
+        node = node or self.place(request.name)
+        placed = self._locations.get(request.name) != node.name
+        if placed:
+            # Claimed before the call so concurrent creates see the load
+            self._locations[request.name] = node.name
+            self._load[node.name] += 1
+        try:
+            return await node.room_service.create_room(request)
+        except Exception:
+            if placed and self._locations.pop(request.name, None) is not None:
+                self._load[node.name] -= 1
+            raise
+
+    async def delete_room(self, request: room_proto.DeleteRoomRequest):
+        node = await self.locate(request.room)
+        response = await node.room_service.delete_room(request)
+        if self._locations.pop(request.room, None) is not None:
+            self._load[node.name] = max(0, self._load[node.name] - 1)
+        return response
+
+    def __getattr__(self, name: str):
+        # Every other RoomService call names its room in the request
+        if name.startswith("_"):
+            raise AttributeError(name)
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            async def wrapped(request, *args, **kwargs):
+                node = await self.locate(request.room)
+                return await getattr(node.room_service, name)(request, *args, **kwargs)
+            self._wrapped[name] = wrapped
+        return wrapped
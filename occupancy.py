@@ -0,0 +1,253 @@
+"""
+Room occupancy history in fixed-size ring buffers for the LiveKit Streaming Platform
+"""
+import asyncio
+import time
+import warnings
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from livekit.protocol.models import Room
+
+# (seconds per slot, slots kept) from finest to coarsest
+Tier = Tuple[int, int]
+DEFAULT_TIERS: Sequence[Tier] = ((10, 180), (60, 240), (900, 192))
+FIELDS = ("participants", "publishers", "peak")
+PERCENTILES = (50, 90, 95, 99)
+
+RoomsLoader = Callable[[], Awaitable[Iterable[Room]]]
+
+
+def parse_tiers(spec: str) -> List[Tier]:
+    """Tiers from ``"10:180,60:240"`` (seconds per slot:slots)"""
+    tiers = []
+    for part in spec.split(","):
+        interval, slots = part.split(":")
+        tiers.append((int(interval), int(slots)))
+    return tiers
+
+
+class RingTier:
+    """One resolution: a (rooms, slots) array per field, shared by every room.
+
+    Slot ``i`` of the ring holds time bucket ``stamps[i]``; NaN marks rooms
+    with no data for a bucket, so averages skip them.
+    """
+
+    def __init__(self, interval: int, slots: int, rows: int):
+        self.interval = interval
+        self.slots = slots
+        self.stamps = np.full(slots, -1, dtype=np.int64)
+        self.data = {field: np.full((rows, slots), np.nan, dtype=np.float32) for field in FIELDS}
+        self.last: Optional[int] = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.stamps.nbytes + sum(array.nbytes for array in self.data.values())
+
+    def grow(self, rows: int):
+        for field, array in self.data.items():
+            grown = np.full((rows, self.slots), np.nan, dtype=np.float32)
+            grown[:len(array)] = array
+            self.data[field] = grown
+
+    def clear_row(self, row: int):
+        for array in self.data.values():
+            array[row] = np.nan
+
+    def open_bucket(self, bucket: int):
+        """Point a slot at a new bucket, with no data yet for any room"""
+        column = bucket % self.slots
+        self.stamps[column] = bucket
+        for array in self.data.values():
+            array[:, column] = np.nan
+        return column
+
+    def columns(self, first: int, last: int) -> np.ndarray:
+        """Slots holding buckets first..last, oldest first"""
+        columns = np.nonzero((self.stamps >= first) & (self.stamps <= last))[0]
+        return columns[np.argsort(self.stamps[columns])]
+
+
+class OccupancyStore:
+    """Participant and publisher counts per room over time, at several resolutions.
+
+    The finest tier takes one sample per room per interval; each coarser tier
+    is filled by averaging (and taking the peak of) the tier below once one
+    of its buckets completes. All rooms share the same arrays, one row each,
+    and rows of rooms that ended are recycled, so memory stays fixed per
+    tracked room no matter how long the service runs.
+    """
+
+    def __init__(self, tiers: Sequence[Tier] = DEFAULT_TIERS, initial_rows: int = 1024):
+        tiers = sorted(tiers)
+        for (fine, fine_slots), (coarse, _) in zip(tiers, tiers[1:]):
+            # The finer ring must outlast a coarse bucket to be averaged into it
+            if coarse % fine or fine * fine_slots <= coarse:
+                raise ValueError(f"Tier of {coarse}s cannot be built from one of {fine}s x {fine_slots}")
+        self.tiers = [RingTier(interval, slots, initial_rows) for interval, slots in tiers]
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = list(range(initial_rows - 1, -1, -1))
+        self._capacity = initial_rows
+
+    @property
+    def room_count(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(tier.nbytes for tier in self.tiers)
+
+    def _allocate(self, name: str) -> int:
+        if not self._free:
+            capacity = self._capacity + max(1, self._capacity // 2)
+            for tier in self.tiers:
+                tier.grow(capacity)
+            self._free = list(range(capacity - 1, self._capacity - 1, -1))
+            self._capacity = capacity
+        row = self._free.pop()
+        for tier in self.tiers:
+            tier.clear_row(row)
+        self._rows[name] = row
+        return row
+
+    def record(self, rooms: Iterable[Room], now: Optional[float] = None):
+        """Take one sample of every room; rooms missing from it are forgotten"""
+        now = time.time() if now is None else now
+        rooms = list(rooms)
+        finest = self.tiers[0]
+        bucket = int(now // finest.interval)
+
+        if finest.last is None or bucket > finest.last:
+            # Buckets missed while not sampling hold no data
+            start = bucket if finest.last is None else max(finest.last + 1, bucket - finest.slots + 1)
+            for missed in range(start, bucket + 1):
+                column = finest.open_bucket(missed)
+            finest.last = bucket
+        else:
+            column = bucket % finest.slots
+
+        current = {room.name for room in rooms}
+        for name in [name for name in self._rows if name not in current]:
+            self._free.append(self._rows.pop(name))
+
+        rows = np.fromiter(
+            (self._rows.get(room.name) if room.name in self._rows else self._allocate(room.name)
+             for room in rooms),
+            dtype=np.int64, count=len(rooms),
+        )
+        participants = np.fromiter((room.num_participants for room in rooms), dtype=np.float32, count=len(rooms))
+        publishers = np.fromiter((room.num_publishers for room in rooms), dtype=np.float32, count=len(rooms))
+        finest.data["participants"][rows, column] = participants
+        finest.data["publishers"][rows, column] = publishers
+        finest.data["peak"][rows, column] = participants
+
+        self._downsample(now)
+
+    def _downsample(self, now: float):
+        with warnings.catch_warnings():
+            # Rooms without data in a bucket average to NaN, which is intended
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for fine, coarse in zip(self.tiers, self.tiers[1:]):
+                bucket = int(now // coarse.interval)
+                if coarse.last is None:
+                    coarse.last = bucket
+                    continue
+                ratio = coarse.interval // fine.interval
+                first = max(coarse.last, bucket - coarse.slots)
+                for done in range(first, bucket):
+                    columns = fine.columns(done * ratio, (done + 1) * ratio - 1)
+                    column = coarse.open_bucket(done)
+                    if len(columns):
+                        for field in ("participants", "publishers"):
+                            coarse.data[field][:, column] = np.nanmean(fine.data[field][:, columns], axis=1)
+                        coarse.data["peak"][:, column] = np.nanmax(fine.data["peak"][:, columns], axis=1)
+                coarse.last = bucket
+
+    def stats(self, name: str, window: float, now: Optional[float] = None,
+              include_series: bool = False) -> Optional[Dict]:
+        """Occupancy summary of a room over the last ``window`` seconds"""
+        row = self._rows.get(name)
+        if row is None:
+            return None
+        now = time.time() if now is None else now
+
+        # Finest tier that still reaches back over the whole window
+        tier = next(
+            (tier for tier in self.tiers if tier.interval * tier.slots >= window),
+            self.tiers[-1],
+        )
+        window = min(window, tier.interval * tier.slots)
+        last = int(now // tier.interval)
+        first = last - max(1, int(window // tier.interval)) + 1
+        columns = tier.columns(first, last)
+
+        participants = tier.data["participants"][row, columns]
+        valid = ~np.isnan(participants)
+        participants = participants[valid]
+        publishers = tier.data["publishers"][row, columns][valid]
+        peak = tier.data["peak"][row, columns][valid]
+
+        result = {
+            "room_name": name,
+            "window_seconds": window,
+            "resolution_seconds": tier.interval,
+            "samples": int(valid.sum()),
+        }
+        if len(participants):
+            result.update({
+                "participants": {
+                    "current": float(participants[-1]),
+                    "peak": float(peak.max()),
+                    "average": round(float(participants.mean()), 3),
+                    **{
+                        f"p{p}": round(float(value), 3)
+                        for p, value in zip(PERCENTILES, np.percentile(participants, PERCENTILES))
+                    },
+                },
+                "publishers": {
+                    "current": float(publishers[-1]),
+                    "peak": float(publishers.max()),
+                    "average": round(float(publishers.mean()), 3),
+                },
+            })
+        if include_series:
+            result["series"] = {
+                "timestamps": (tier.stamps[columns][valid] * tier.interval).tolist(),
+                "participants": participants.tolist(),
+                "publishers": publishers.tolist(),
+                "peak": peak.tolist(),
+            }
+        return result
+
+
+class OccupancySampler:
+    """Feeds an OccupancyStore from the room snapshot at the finest tier's interval"""
+
+    def __init__(self, store: OccupancyStore, load_rooms: RoomsLoader):
+        self.store = store
+        self._load_rooms = load_rooms
+        self.interval = store.tiers[0].interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            try:
+                self.store.record(await self._load_rooms())
+            except Exception as e:
+                print(f"⚠️ Occupancy sample failed: {e}")
+            # Sample on interval boundaries so every tick lands in its own slot
+            await asyncio.sleep(self.interval - time.time() % self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
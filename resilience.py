@@ -0,0 +1,175 @@
+"""
+Deadlines, retries and circuit breaking for LiveKit calls on the Streaming Platform
+"""
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List, Sequence
+
+import aiohttp
+from livekit.api.twirp_client import TwirpError, TwirpErrorCode
+
+# Twirp codes that say the server, not the request, is at fault
+RETRYABLE_TWIRP_CODES = {
+    TwirpErrorCode.UNAVAILABLE,
+    TwirpErrorCode.INTERNAL,
+    TwirpErrorCode.DEADLINE_EXCEEDED,
+    TwirpErrorCode.RESOURCE_EXHAUSTED,
+    TwirpErrorCode.UNKNOWN,
+}
+
+
+class UpstreamTimeout(Exception):
+    """A LiveKit call missed its deadline"""
+
+
+class CircuitOpenError(Exception):
+    """LiveKit calls are being short-circuited after repeated failures"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LiveKit unavailable, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class PartialListing(Exception):
+    """Only some LiveKit nodes could list their rooms.
+
+    ``rooms`` holds what the healthy nodes listed; ``unlisted(name)`` says
+    whether a room may live on a node that failed, so callers keep what they
+    last knew of it instead of treating it as gone.
+    """
+
+    def __init__(self, rooms: List, unlisted: Callable[[str], bool], error: Exception):
+        super().__init__(f"Room listing incomplete: {error}")
+        self.rooms = rooms
+        self.unlisted = unlisted
+        self.error = error
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Whether an error indicates LiveKit itself is unhealthy"""
+    if isinstance(error, TwirpError):
+        return error.code in RETRYABLE_TWIRP_CODES
+    return isinstance(
+        error, (UpstreamTimeout, CircuitOpenError, PartialListing, aiohttp.ClientError, OSError)
+    )
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one probe through per reset period"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """Free the half-open probe slot after an attempt that ended without an outcome"""
+        self._probing = False
+
+
+class ResilientProxy:
+    """Wraps the LiveKit RoomService with per-call deadlines, retries and a breaker.
+
+    Only idempotent calls (by method name prefix) are retried, with full
+    jitter exponential backoff. Client errors such as not_found pass through
+    without counting against the breaker.
+    """
+
+    def __init__(self, target, breaker: CircuitBreaker, timeout: float = 5.0, retries: int = 2,
+                 backoff: float = 0.1, backoff_max: float = 1.0,
+                 idempotent_prefixes: Sequence[str] = ("list_", "get_")):
+        self._target = target
+        self.breaker = breaker
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.idempotent_prefixes = tuple(idempotent_prefixes)
+        self.retry_count = 0
+        self._wrapped: Dict[str, Callable] = {}
+
+    @property
+    def target(self):
+        return self._target
+
+    def __getattr__(self, name: str):
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+
+        attribute = getattr(self._target, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+        attempts = 1 + (self.retries if name.startswith(self.idempotent_prefixes) else 0)
+
+        async def wrapped(*args, **kwargs):
+            for attempt in range(attempts):
+                if not self.breaker.allow():
+                    raise CircuitOpenError(self.breaker.retry_after)
+                try:
+                    result = await asyncio.wait_for(attribute(*args, **kwargs), self.timeout)
+                except asyncio.TimeoutError:
+                    error = UpstreamTimeout(f"LiveKit {name} exceeded {self.timeout}s")
+                except asyncio.CancelledError:
+                    # The caller went away, which says nothing about LiveKit
+                    self.breaker.release()
+                    raise
+                except Exception as e:
+                    if not is_upstream_failure(e):
+                        self.breaker.record_success()
+                        raise
+                    error = e
+                else:
+                    self.breaker.record_success()
+                    return result
+
+                self.breaker.record_failure()
+                if attempt + 1 == attempts:
+                    raise error
+                self.retry_count += 1
+                delay = min(self.backoff_max, self.backoff * 2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+
+        self._wrapped[name] = wrapped
+        return wrapped
@@ -0,0 +1,337 @@
+"""
+Shared room snapshot cache for the LiveKit Streaming Platform
+"""
+import asyncio
+import time
+from bisect import bisect_left, bisect_right
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+from livekit.protocol.models import ParticipantInfo, Room
+
+from resilience import PartialListing
+
+RoomFetcher = Callable[[Optional[List[str]]], Awaitable[List[Room]]]
+
+
+class RoomSnapshotCache:
+    """Process-wide snapshot of the LiveKit room list.
+
+    A background task keeps the snapshot fresh, reads never wait on the
+    upstream while the snapshot is younger than ``ttl`` and concurrent misses
+    share a single ``ListRooms`` call. Lookups by name that miss a fresh
+    snapshot ask LiveKit for just those rooms instead of the whole list.
+
+    Participants are only tracked for rooms that have been seeded, after which
+    webhook events keep them current. A refresh that disagrees with a tracked
+    room's participant count drops the tracking so the next read re-seeds it.
+
+    If LiveKit cannot be reached, reads fall back to the last snapshot for up
+    to ``max_stale`` seconds; ``refresh_failed`` tells callers to flag it.
+    When only part of the rooms could be listed (a PartialListing), the rest
+    keep their last known state for as long, and the snapshot counts as stale.
+
+    Every change bumps ``version``; rooms and participant lists also carry
+    the version of their last change, which callers use to reuse serialized
+    responses and as ETags.
+    """
+
+    def __init__(self, fetch_rooms: RoomFetcher, ttl: float = 5.0, refresh_interval: float = 2.0,
+                 max_stale: float = 300.0):
+        self._fetch_rooms = fetch_rooms
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.max_stale = max_stale
+        self.refresh_failed = False
+
+        self._rooms: Dict[str, Room] = {}
+        self._participants: Dict[str, Dict[str, ParticipantInfo]] = {}
+        self._sorted_names: Optional[List[str]] = None
+        self._fetched_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._room_inflight: Dict[str, asyncio.Task] = {}
+        self._refresher: Optional[asyncio.Task] = None
+
+        self.version = 0
+        self._room_versions: Dict[str, int] = {}
+        self._participant_versions: Dict[str, int] = {}
+
+    def _bump_room(self, name: str):
+        self.version += 1
+        self._room_versions[name] = self.version
+
+    def _bump_participants(self, name: str):
+        self.version += 1
+        self._participant_versions[name] = self.version
+
+    def room_version(self, name: str) -> Optional[int]:
+        """Version of a room's last change, None if it is not cached"""
+        return self._room_versions.get(name)
+
+    def participants_version(self, name: str) -> Optional[int]:
+        """Version of a tracked participant list's last change, None if untracked"""
+        return self._participant_versions.get(name)
+
+    def touch(self, name: str):
+        """Mark a room as changed after its local configuration was written"""
+        if name in self._rooms:
+            self._bump_room(name)
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful refresh"""
+        if self._fetched_at is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    @property
+    def room_count(self) -> int:
+        return len(self._rooms)
+
+    @property
+    def participant_total(self) -> int:
+        return sum(room.num_participants for room in self._rooms.values())
+
+    def is_fresh(self) -> bool:
+        """Whether the snapshot is within the staleness bound"""
+        age = self.age
+        return age is not None and age <= self.ttl
+
+    def can_serve_stale(self) -> bool:
+        """Whether the snapshot may stand in for LiveKit while it is failing"""
+        age = self.age
+        return age is not None and age <= self.max_stale
+
+    @property
+    def staleness(self) -> Optional[float]:
+        """Age of the snapshot if it is being served because refreshes fail"""
+        if self.refresh_failed and not self.is_fresh():
+            # Partial listings can be served before any complete one
+            return self.age if self.age is not None else 0.0
+        return None
+
+    async def refresh(self) -> Dict[str, Room]:
+        """Reload the snapshot, joining an in-flight refresh if there is one"""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._load())
+        # Shield so a cancelled reader does not cancel the shared fetch
+        return await asyncio.shield(self._inflight)
+
+    async def _load(self) -> Dict[str, Room]:
+        partial = None
+        try:
+            rooms = await self._fetch_rooms(None)
+        except PartialListing as e:
+            rooms, partial = e.rooms, e
+        except Exception:
+            self.refresh_failed = True
+            raise
+        previous = self._rooms
+        self._rooms = {room.name: room for room in rooms}
+        if partial is None:
+            self.refresh_failed = False
+            self._fetched_at = time.monotonic()
+        else:
+            # Still a failed refresh: the unlisted rooms age like a stale snapshot
+            self.refresh_failed = True
+            if self.can_serve_stale():
+                for name, room in previous.items():
+                    if name not in self._rooms and partial.unlisted(name):
+                        self._rooms[name] = room
+
+        for name, room in self._rooms.items():
+            if previous.get(name) != room:
+                self._bump_room(name)
+        for name in previous.keys() - self._rooms.keys():
+            self._room_versions.pop(name, None)
+            self.version += 1
+        if previous.keys() != self._rooms.keys():
+            self._sorted_names = None
+
+        # Stop trusting participant lists that no longer match the server
+        for name in list(self._participants):
+            room = self._rooms.get(name)
+            if room is None or room.num_participants != len(self._participants[name]):
+                del self._participants[name]
+                self._participant_versions.pop(name, None)
+        return self._rooms
+
+    async def _snapshot(self) -> Dict[str, Room]:
+        if self.is_fresh():
+            return self._rooms
+        try:
+            return await self.refresh()
+        except Exception:
+            if self.can_serve_stale():
+                return self._rooms
+            raise
+
+    async def rooms_after(self, after: Optional[str] = None, prefix: str = "") -> Iterator[Room]:
+        """Rooms in name order, starting after a cursor and limited to a prefix"""
+        rooms = await self._snapshot()
+        if self._sorted_names is None:
+            self._sorted_names = sorted(rooms)
+        names = self._sorted_names
+
+        start = bisect_right(names, after) if after is not None else 0
+        if prefix:
+            start = max(start, bisect_left(names, prefix))
+
+        def generate():
+            for index in range(start, len(names)):
+                name = names[index]
+                if prefix and not name.startswith(prefix):
+                    return
+                room = rooms.get(name)
+                if room is not None:
+                    yield room
+
+        return generate()
+
+    async def get_room(self, name: str, lookup: bool = False) -> Optional[Room]:
+        """Look up a single room by name.
+
+        With ``lookup`` a room missing from a fresh snapshot is still asked
+        for, for rooms known to exist, e.g. created by another worker.
+        """
+        if self.is_fresh() and (name in self._rooms or not lookup):
+            return self._rooms.get(name)
+
+        # Concurrent misses for the same name share one targeted lookup
+        task = self._room_inflight.get(name)
+        if task is None:
+            task = asyncio.create_task(self._load_rooms([name]))
+            self._room_inflight[name] = task
+            task.add_done_callback(lambda _: self._room_inflight.pop(name, None))
+        try:
+            return (await asyncio.shield(task)).get(name)
+        except Exception:
+            if self.can_serve_stale() and name in self._rooms:
+                return self._rooms[name]
+            raise
+
+    async def get_rooms(self, names: List[str], lookup: bool = False) -> Dict[str, Room]:
+        """Look up several rooms by name with at most one upstream call, see ``get_room``"""
+        if self.is_fresh() and (not lookup or all(name in self._rooms for name in names)):
+            return {name: self._rooms[name] for name in names if name in self._rooms}
+        try:
+            return await self._load_rooms(names)
+        except Exception:
+            if self.can_serve_stale():
+                return {name: self._rooms[name] for name in names if name in self._rooms}
+            raise
+
+    async def _load_rooms(self, names: List[str]) -> Dict[str, Room]:
+        partial = None
+        try:
+            fetched = await self._fetch_rooms(names)
+        except PartialListing as e:
+            fetched, partial = e.rooms, e
+            self.refresh_failed = True
+        except Exception:
+            self.refresh_failed = True
+            raise
+        rooms = {room.name: room for room in fetched}
+        unknown = False
+        for name in names:
+            if name in rooms:
+                self.update_room(rooms[name])
+            elif partial is not None and partial.unlisted(name):
+                if self.can_serve_stale() and name in self._rooms:
+                    rooms[name] = self._rooms[name]
+                else:
+                    unknown = True
+            else:
+                self.remove_room(name)
+        if unknown:
+            # Whether the room exists is up to a node that cannot be reached
+            raise partial.error
+        return rooms
+
+    def peek_room(self, name: str) -> Optional[Room]:
+        """Look up a room without refreshing the snapshot"""
+        return self._rooms.get(name)
+
+    def update_room(self, room: Room):
+        """Write a room through to the snapshot after a local change"""
+        previous = self._rooms.get(room.name)
+        if previous is None:
+            self._sorted_names = None
+        self._rooms[room.name] = room
+        if previous != room:
+            self._bump_room(room.name)
+
+    def remove_room(self, name: str):
+        """Drop a room from the snapshot after a local change"""
+        if self._rooms.pop(name, None) is not None:
+            self._sorted_names = None
+            self.version += 1
+        self._room_versions.pop(name, None)
+        self._participants.pop(name, None)
+        self._participant_versions.pop(name, None)
+
+    def participants(self, room_name: str) -> Optional[List[ParticipantInfo]]:
+        """Tracked participants of a room, or None if the room is not tracked"""
+        participants = self._participants.get(room_name)
+        if participants is None:
+            return None
+        return list(participants.values())
+
+    def set_participants(self, room_name: str, participants: List[ParticipantInfo]):
+        """Start tracking a room's participants from a full listing"""
+        self._participants[room_name] = {p.identity: p for p in participants}
+        self._bump_participants(room_name)
+
+    def update_participant(self, room_name: str, participant: ParticipantInfo):
+        """Add or replace a participant of a tracked room"""
+        participants = self._participants.get(room_name)
+        if participants is None:
+            return
+        participants[participant.identity] = participant
+        self._bump_participants(room_name)
+        self._sync_counts(room_name)
+
+    def remove_participant(self, room_name: str, identity: str):
+        """Remove a participant from a tracked room"""
+        participants = self._participants.get(room_name)
+        if participants is None:
+            return
+        if participants.pop(identity, None) is None:
+            return
+        self._bump_participants(room_name)
+        self._sync_counts(room_name)
+
+    def _sync_counts(self, room_name: str):
+        room = self._rooms.get(room_name)
+        if room is None:
+            return
+        participants = self._participants[room_name].values()
+        updated = Room()
+        updated.CopyFrom(room)
+        updated.num_participants = len(participants)
+        updated.num_publishers = sum(1 for p in participants if len(p.tracks) > 0)
+        self._rooms[room_name] = updated
+        if updated != room:
+            self._bump_room(room_name)
+
+    def start(self):
+        """Start the background refresher"""
+        if self.refresh_interval > 0 and self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the background refresher"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ Room cache refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
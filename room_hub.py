@@ -0,0 +1,153 @@
+"""
+Per-room websocket fan-out for the LiveKit Streaming Platform
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from livekit.protocol.models import Room
+
+RoomGetter = Callable[[str], Awaitable[Optional[Room]]]
+
+
+class RoomSubscriber:
+    """A websocket subscribed to one room, fed through a bounded queue"""
+
+    def __init__(self, room_name: str, websocket: WebSocket, queue_size: int):
+        self.room_name = room_name
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.sender: Optional[asyncio.Task] = None
+
+    def offer(self, message: str):
+        """Queue a message, dropping the oldest one if the client is behind"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def run(self):
+        """Forward queued messages to the websocket"""
+        while True:
+            message = await self.queue.get()
+            await self.websocket.send_text(message)
+
+
+class RoomHub:
+    """Runs one upstream watcher per room and broadcasts changes to its sockets"""
+
+    def __init__(self, get_room: RoomGetter, poll_interval: float = 1.0,
+                 heartbeat_interval: float = 30.0, queue_size: int = 16):
+        self._get_room = get_room
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.queue_size = queue_size
+
+        self._subscribers: Dict[str, Set[RoomSubscriber]] = {}
+        self._watchers: Dict[str, asyncio.Task] = {}
+        self._last_state: Dict[str, Tuple[int, str]] = {}
+        self._last_message: Dict[str, str] = {}
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    @property
+    def room_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, room_name: str, websocket: WebSocket) -> RoomSubscriber:
+        """Register a websocket, starting the room watcher if it is the first one"""
+        subscriber = RoomSubscriber(room_name, websocket, self.queue_size)
+        subscriber.sender = asyncio.create_task(subscriber.run())
+        self._subscribers.setdefault(room_name, set()).add(subscriber)
+
+        # Late joiners get the current state straight away
+        if room_name in self._last_message:
+            subscriber.offer(self._last_message[room_name])
+
+        if room_name not in self._watchers:
+            self._watchers[room_name] = asyncio.create_task(self._watch(room_name))
+        return subscriber
+
+    async def unsubscribe(self, subscriber: RoomSubscriber):
+        """Unregister a websocket, stopping the room watcher after the last one"""
+        room_name = subscriber.room_name
+        subscribers = self._subscribers.get(room_name)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[room_name]
+                watcher = self._watchers.pop(room_name, None)
+                if watcher:
+                    watcher.cancel()
+                self._last_state.pop(room_name, None)
+                self._last_message.pop(room_name, None)
+
+        if subscriber.sender:
+            subscriber.sender.cancel()
+            try:
+                await subscriber.sender
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def publish(self, room: Room):
+        """Push a room's state to its subscribers if it changed"""
+        if room.name not in self._subscribers:
+            return
+        state = (room.num_participants, room.metadata)
+        if self._last_state.get(room.name) == state:
+            return
+        self._last_state[room.name] = state
+
+        message = json.dumps({
+            "type": "room_update",
+            "data": {
+                "name": room.name,
+                "num_participants": room.num_participants,
+                "metadata": room.metadata,
+                "timestamp": datetime.now().isoformat()
+            }
+        })
+        self._last_message[room.name] = message
+        self._broadcast(room.name, message)
+
+    def _broadcast(self, room_name: str, message: str):
+        # Serialized once, shared by every socket in the room
+        for subscriber in self._subscribers.get(room_name, ()):
+            subscriber.offer(message)
+
+    async def _watch(self, room_name: str):
+        last_sent = time.monotonic()
+        while True:
+            try:
+                room = await self._get_room(room_name)
+                if room:
+                    before = self._last_state.get(room_name)
+                    self.publish(room)
+                    if self._last_state.get(room_name) != before:
+                        last_sent = time.monotonic()
+
+                if self.heartbeat_interval > 0 and time.monotonic() - last_sent >= self.heartbeat_interval:
+                    self._broadcast(room_name, json.dumps({
+                        "type": "heartbeat",
+                        "data": {"timestamp": datetime.now().isoformat()}
+                    }))
+                    last_sent = time.monotonic()
+            except Exception as e:
+                print(f"⚠️ Room watcher error for {room_name}: {e}")
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def close(self):
+        """Stop every watcher and sender"""
+        for watcher in self._watchers.values():
+            watcher.cancel()
+        for subscribers in list(self._subscribers.values()):
+            for subscriber in list(subscribers):
+                await self.unsubscribe(subscriber)
+        self._watchers.clear()
@@ -0,0 +1,486 @@
+"""
+Shared room and participant state for the LiveKit Streaming Platform
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from membership import RoomMembership
+
+
+class StateStore(ABC):
+    """Room configs and participant membership shared by every API worker"""
+
+    # Whether other processes read and write the same state
+    shared = False
+
+    @abstractmethod
+    async def put_rooms(self, configs: Dict[str, Dict]):
+        """Store several room configs in one step, resetting their participants"""
+
+    async def put_room(self, name: str, config: Dict):
+        """Store a room's config, resetting its participants"""
+        await self.put_rooms({name: config})
+
+    @abstractmethod
+    async def get_room(self, name: str) -> Optional[Dict]:
+        """Config of a single room"""
+
+    @abstractmethod
+    async def get_rooms(self, names: List[str]) -> Dict[str, Dict]:
+        """Configs of the named rooms that exist"""
+
+    @abstractmethod
+    async def list_rooms(self) -> Dict[str, Dict]:
+        """Configs of every room"""
+
+    @abstractmethod
+    async def delete_rooms(self, names: List[str]):
+        """Forget several rooms and their participants in one step"""
+
+    @abstractmethod
+    async def config_version(self) -> int:
+        """Counter bumped by every config write, for caches built from configs"""
+
+    @abstractmethod
+    async def restore_room(self, name: str, config: Dict, identities: List[str]) -> Dict:
+        """Store a room recovered from LiveKit, with its participants as joined, unless
+        it is stored already; returns the stored config.
+
+        Unlike ``put_room`` this keeps participants recorded for the room
+        meanwhile, such as joins reported by webhooks during the recovery.
+        """
+
+    async def delete_room(self, name: str):
+        """Forget a room and its participants"""
+        await self.delete_rooms([name])
+
+    @abstractmethod
+    async def admit_many(self, room: str, identities: List[str]) -> List[bool]:
+        """Atomically reserve slots for participants while the room has capacity"""
+
+    async def admit(self, room: str, identity: str) -> bool:
+        """Atomically reserve a slot for a participant if the room has capacity"""
+        return (await self.admit_many(room, [identity]))[0]
+
+    @abstractmethod
+    async def add_participants(self, room: str, identities: List[str]):
+        """Mark several participants as joined in one step, regardless of capacity"""
+
+    async def add_participant(self, room: str, identity: str):
+        """Mark a participant as joined, regardless of capacity"""
+        await self.add_participants(room, [identity])
+
+    @abstractmethod
+    async def remove_participant(self, room: str, identity: str):
+        """Remove a participant"""
+
+    @abstractmethod
+    async def clear_participants(self, room: str):
+        """Remove every participant of a room"""
+
+    async def close(self):
+        """Release backend resources"""
+
+
+class MemoryStateStore(StateStore):
+    """State kept in this process, for single-worker deployments"""
+
+    def __init__(self, reservation_ttl: float = 0.0):
+        self.reservation_ttl = reservation_ttl
+        self._rooms: Dict[str, Dict] = {}
+        self._members: Dict[str, RoomMembership] = {}
+        self._config_version = 0
+
+    async def put_rooms(self, configs: Dict[str, Dict]):
+        self._config_version += 1
+        for name, config in configs.items():
+            self._rooms[name] = dict(config)
+            self._members[name] = RoomMembership(config["max_participants"], self.reservation_ttl)
+
+    async def get_room(self, name: str) -> Optional[Dict]:
+        return self._rooms.get(name)
+
+    async def get_rooms(self, names: List[str]) -> Dict[str, Dict]:
+        return {name: self._rooms[name] for name in names if name in self._rooms}
+
+    async def list_rooms(self) -> Dict[str, Dict]:
+        return dict(self._rooms)
+
+    async def delete_rooms(self, names: List[str]):
+        self._config_version += 1
+        for name in names:
+            self._rooms.pop(name, None)
+            self._members.pop(name, None)
+
+    async def config_version(self) -> int:
+        return self._config_version
+
+    async def restore_room(self, name: str, config: Dict, identities: List[str]) -> Dict:
+        if name in self._rooms:
+            return self._rooms[name]
+        self._config_version += 1
+        self._rooms[name] = dict(config)
+        membership = self._members.get(name)
+        if membership is None:
+            membership = self._members[name] = RoomMembership(config["max_participants"], self.reservation_ttl)
+        membership.capacity = config["max_participants"]
+        for identity in identities:
+            membership.confirm(identity)
+        return self._rooms[name]
+
+    async def admit_many(self, room: str, identities: List[str]) -> List[bool]:
+        # No awaits in here, so the check and the reservation cannot interleave
+        membership = self._members.get(room)
+        if membership is None or room not in self._rooms:
+            return [False] * len(identities)
+        return [membership.reserve(identity) for identity in identities]
+
+    async def add_participants(self, room: str, identities: List[str]):
+        membership = self._members.get(room)
+        if membership is None:
+            # Kept for a room not stored yet, until it is restored or finishes
+            membership = self._members[room] = RoomMembership(0, self.reservation_ttl)
+        for identity in identities:
+            membership.confirm(identity)
+
+    async def remove_participant(self, room: str, identity: str):
+        membership = self._members.get(room)
+        if membership is not None:
+            membership.release(identity)
+
+    async def clear_participants(self, room: str):
+        membership = self._members.get(room)
+        if membership is not None:
+            membership.clear()
+        if room not in self._rooms:
+            self._members.pop(room, None)
+
+
+class SQLiteStateStore(StateStore):
+    """State in a SQLite file in WAL mode, shared by workers on one host.
+
+    Each room row carries a participant counter kept in step with the
+    participants table, so capacity checks never count rows.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, reservation_ttl: float = 0.0):
+        self.reservation_ttl = reservation_ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS rooms (
+                name TEXT PRIMARY KEY,
+                config TEXT NOT NULL,
+                max_participants INTEGER NOT NULL,
+                participant_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS participants (
+                room TEXT NOT NULL,
+                identity TEXT NOT NULL,
+                joined INTEGER NOT NULL DEFAULT 0,
+                expires_at REAL,
+                PRIMARY KEY (room, identity)
+            );
+            CREATE INDEX IF NOT EXISTS participants_expiry
+                ON participants (room, joined, expires_at);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _locked(self, fn, *args):
+        with self._lock:
+            return fn(*args)
+
+    def _transaction(self, fn, *args):
+        # IMMEDIATE takes the write lock up front so concurrent workers
+        # serialize on admission instead of failing on upgrade
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(*args)
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        return result
+
+    def _adjust_count(self, room: str, delta: int):
+        if delta:
+            self._db.execute(
+                "UPDATE rooms SET participant_count = participant_count + ? WHERE name = ?",
+                (delta, room),
+            )
+
+    def _bump_config_version(self):
+        self._db.execute(
+            "INSERT INTO counters (name, value) VALUES ('config_version', 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1"
+        )
+
+    def _expire(self, room: str):
+        # Reservations whose tokens were never used stop holding a slot
+        expired = self._db.execute(
+            "DELETE FROM participants WHERE room = ? AND joined = 0 AND expires_at <= ?",
+            (room, time.time()),
+        ).rowcount
+        self._adjust_count(room, -expired)
+
+    async def put_rooms(self, configs: Dict[str, Dict]):
+        def put():
+            self._db.executemany(
+                "INSERT OR REPLACE INTO rooms (name, config, max_participants, participant_count) "
+                "VALUES (?, ?, ?, 0)",
+                [(name, json.dumps(config), config["max_participants"]) for name, config in configs.items()],
+            )
+            self._db.executemany(
+                "DELETE FROM participants WHERE room = ?", [(name,) for name in configs]
+            )
+            self._bump_config_version()
+        await self._run(self._transaction, put)
+
+    async def get_room(self, name: str) -> Optional[Dict]:
+        return (await self.get_rooms([name])).get(name)
+
+    async def get_rooms(self, names: List[str]) -> Dict[str, Dict]:
+        def get():
+            placeholders = ",".join("?" * len(names))
+            rows = self._db.execute(
+                f"SELECT name, config FROM rooms WHERE name IN ({placeholders})", names
+            ).fetchall()
+            return {name: json.loads(config) for name, config in rows}
+        if not names:
+            return {}
+        return await self._run(get)
+
+    async def list_rooms(self) -> Dict[str, Dict]:
+        def list_all():
+            rows = self._db.execute("SELECT name, config FROM rooms").fetchall()
+            return {name: json.loads(config) for name, config in rows}
+        return await self._run(list_all)
+
+    async def delete_rooms(self, names: List[str]):
+        def delete():
+            self._db.executemany("DELETE FROM rooms WHERE name = ?", [(name,) for name in names])
+            self._db.executemany("DELETE FROM participants WHERE room = ?", [(name,) for name in names])
+            self._bump_config_version()
+        await self._run(self._transaction, delete)
+
+    async def config_version(self) -> int:
+        def get():
+            row = self._db.execute("SELECT value FROM counters WHERE name = 'config_version'").fetchone()
+            return row[0] if row else 0
+        return await self._run(get)
+
+    async def restore_room(self, name: str, config: Dict, identities: List[str]) -> Dict:
+        def restore():
+            row = self._db.execute("SELECT config FROM rooms WHERE name = ?", (name,)).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+            self._db.executemany(
+                "INSERT INTO participants (room, identity, joined) VALUES (?, ?, 1) "
+                "ON CONFLICT (room, identity) DO UPDATE SET joined = 1, expires_at = NULL",
+                [(name, identity) for identity in identities],
+            )
+            (count,) = self._db.execute(
+                "SELECT COUNT(*) FROM participants WHERE room = ?", (name,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT INTO rooms (name, config, max_participants, participant_count) VALUES (?, ?, ?, ?)",
+                (name, json.dumps(config), config["max_participants"], count),
+            )
+            self._bump_config_version()
+            return config
+        return await self._run(self._transaction, restore)
+
+    async def admit_many(self, room: str, identities: List[str]) -> List[bool]:
+        def admit():
+            self._expire(room)
+            row = self._db.execute(
+                "SELECT max_participants, participant_count FROM rooms WHERE name = ?", (room,)
+            ).fetchone()
+            if row is None:
+                return [False] * len(identities)
+            capacity, count = row
+            expires_at = time.time() + self.reservation_ttl if self.reservation_ttl > 0 else None
+
+            results = []
+            added = 0
+            for identity in identities:
+                existing = self._db.execute(
+                    "SELECT joined FROM participants WHERE room = ? AND identity = ?", (room, identity)
+                ).fetchone()
+                if existing:
+                    if not existing[0]:
+                        self._db.execute(
+                            "UPDATE participants SET expires_at = ? WHERE room = ? AND identity = ?",
+                            (expires_at, room, identity),
+                        )
+                    results.append(True)
+                elif count + added < capacity:
+                    self._db.execute(
+                        "INSERT INTO participants (room, identity, joined, expires_at) VALUES (?, ?, 0, ?)",
+                        (room, identity, expires_at),
+                    )
+                    added += 1
+                    results.append(True)
+                else:
+                    results.append(False)
+            self._adjust_count(room, added)
+            return results
+        return await self._run(self._transaction, admit)
+
+    async def add_participants(self, room: str, identities: List[str]):
+        def confirm():
+            added = 0
+            for identity in identities:
+                updated = self._db.execute(
+                    "UPDATE participants SET joined = 1, expires_at = NULL WHERE room = ? AND identity = ?",
+                    (room, identity),
+                ).rowcount
+                if not updated:
+                    self._db.execute(
+                        "INSERT INTO participants (room, identity, joined) VALUES (?, ?, 1)", (room, identity)
+                    )
+                    added += 1
+            self._adjust_count(room, added)
+        await self._run(self._transaction, confirm)
+
+    async def remove_participant(self, room: str, identity: str):
+        def remove():
+            removed = self._db.execute(
+                "DELETE FROM participants WHERE room = ? AND identity = ?", (room, identity)
+            ).rowcount
+            self._adjust_count(room, -removed)
+        await self._run(self._transaction, remove)
+
+    async def clear_participants(self, room: str):
+        def clear():
+            self._db.execute("DELETE FROM participants WHERE room = ?", (room,))
+            self._db.execute("UPDATE rooms SET participant_count = 0 WHERE name = ?", (room,))
+        await self._run(self._transaction, clear)
+
+    async def close(self):
+        await self._run(self._db.close)
+
+
+class CachedStateStore(StateStore):
+    """Process-local read cache of room configs in front of a shared store.
+
+    Only config reads are cached, and only for rooms that exist, so a room
+    another worker just created is seen at once; admission and participant
+    counts always go to the backend so capacity checks stay exact.
+    """
+
+    def __init__(self, backend: StateStore, ttl: float = 1.0):
+        self._backend = backend
+        self.ttl = ttl
+        self._rooms: Dict[str, Tuple[float, Dict]] = {}
+        self._all: Optional[Tuple[float, Dict[str, Dict]]] = None
+        self._version: Optional[Tuple[float, int]] = None
+
+    @property
+    def shared(self) -> bool:
+        return self._backend.shared
+
+    def _fresh(self, cached_at: float) -> bool:
+        return time.monotonic() - cached_at <= self.ttl
+
+    def _invalidate(self, name: str):
+        self._rooms.pop(name, None)
+        self._all = None
+        self._version = None
+
+    async def put_rooms(self, configs: Dict[str, Dict]):
+        await self._backend.put_rooms(configs)
+        for name in configs:
+            self._invalidate(name)
+
+    async def get_room(self, name: str) -> Optional[Dict]:
+        entry = self._rooms.get(name)
+        if entry and self._fresh(entry[0]):
+            return entry[1]
+        config = await self._backend.get_room(name)
+        if config is not None:
+            self._rooms[name] = (time.monotonic(), config)
+        return config
+
+    async def get_rooms(self, names: List[str]) -> Dict[str, Dict]:
+        rooms = {}
+        missing = []
+        for name in names:
+            entry = self._rooms.get(name)
+            if entry and self._fresh(entry[0]):
+                rooms[name] = entry[1]
+            else:
+                missing.append(name)
+        if missing:
+            fetched = await self._backend.get_rooms(missing)
+            now = time.monotonic()
+            for name, config in fetched.items():
+                self._rooms[name] = (now, config)
+            rooms.update(fetched)
+        return rooms
+
+    async def list_rooms(self) -> Dict[str, Dict]:
+        if self._all and self._fresh(self._all[0]):
+            return self._all[1]
+        rooms = await self._backend.list_rooms()
+        self._all = (time.monotonic(), rooms)
+        return rooms
+
+    async def delete_rooms(self, names: List[str]):
+        await self._backend.delete_rooms(names)
+        for name in names:
+            self._invalidate(name)
+
+    async def config_version(self) -> int:
+        # Writes by other workers show up within the cache TTL, like configs
+        if self._version and self._fresh(self._version[0]):
+            return self._version[1]
+        version = await self._backend.config_version()
+        self._version = (time.monotonic(), version)
+        return version
+
+    async def restore_room(self, name: str, config: Dict, identities: List[str]) -> Dict:
+        stored = await self._backend.restore_room(name, config, identities)
+        self._invalidate(name)
+        return stored
+
+    async def admit_many(self, room: str, identities: List[str]) -> List[bool]:
+        return await self._backend.admit_many(room, identities)
+
+    async def add_participants(self, room: str, identities: List[str]):
+        await self._backend.add_participants(room, identities)
+
+    async def remove_participant(self, room: str, identity: str):
+        await self._backend.remove_participant(room, identity)
+
+    async def clear_participants(self, room: str):
+        await self._backend.clear_participants(room)
+
+    async def close(self):
+        await self._backend.close()
+
+
+def create_state_store(url: str, cache_ttl: float = 1.0, reservation_ttl: float = 0.0) -> StateStore:
+    """Build a store from a URL such as ``memory://`` or ``sqlite:///state.db``"""
+    if url.startswith("memory://"):
+        return MemoryStateStore(reservation_ttl=reservation_ttl)
+    if url.startswith("sqlite:///"):
+        store = SQLiteStateStore(url[len("sqlite:///"):], reservation_ttl=reservation_ttl)
+        return CachedStateStore(store, ttl=cache_ttl) if cache_ttl > 0 else store
+    raise ValueError(f"Unsupported state store URL: {url}")
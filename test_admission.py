@@ -0,0 +1,130 @@
+"""
+Tests for join rate limiting and queueing
+"""
+import asyncio
+import time
+
+import pytest
+
+from admission import AdmissionRejected, JoinAdmission, TokenBucket
+
+
+def admission(**kwargs) -> JoinAdmission:
+    settings = dict(global_rate=0, room_rate=100, room_burst=1)
+    settings.update(kwargs)
+    return JoinAdmission(**settings)
+
+
+def test_bucket_without_rate_never_limits():
+    bucket = TokenBucket(0, 1)
+    bucket.take(1000)
+    assert bucket.delay() == 0
+    assert bucket.available() == float("inf")
+
+
+def test_burst_goes_straight_through():
+    limiter = admission(room_burst=5)
+
+    async def scenario():
+        return [await limiter.acquire("room") for _ in range(5)]
+
+    assert asyncio.run(scenario()) == [0.0] * 5
+    assert limiter.stats["queued"] == 0
+
+
+def test_queued_joins_are_served_in_order_hosts_first():
+    limiter = admission()
+    order = []
+
+    async def join(name: str, priority: bool = False):
+        await limiter.acquire("room", priority)
+        order.append(name)
+
+    async def scenario():
+        await join("first")
+        await asyncio.gather(join("viewer-1"), join("viewer-2"), join("host", priority=True))
+
+    asyncio.run(scenario())
+    assert order == ["first", "host", "viewer-1", "viewer-2"]
+    assert limiter.stats["queued"] == 3
+
+
+def test_full_queue_is_rejected():
+    limiter = admission(room_rate=1, queue_size=1)
+
+    async def scenario():
+        await limiter.acquire("room")
+        waiting = asyncio.create_task(limiter.acquire("room"))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(AdmissionRejected) as rejected:
+                await limiter.acquire("room")
+            # Other rooms have queues of their own
+            assert await limiter.acquire("other") == 0.0
+            return rejected.value.retry_after
+        finally:
+            waiting.cancel()
+
+    assert asyncio.run(scenario()) > 0
+    assert limiter.stats["rejected"] == 1
+
+
+def test_host_lane_is_bounded_on_its_own():
+    limiter = admission(room_rate=1, queue_size=10, host_queue_size=1)
+
+    async def scenario():
+        await limiter.acquire("room")
+        waiting = [asyncio.create_task(limiter.acquire("room", priority=True))]
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(AdmissionRejected):
+                await limiter.acquire("room", priority=True)
+            waiting.append(asyncio.create_task(limiter.acquire("room")))
+            await asyncio.sleep(0)
+            return limiter.room_depth("room")
+        finally:
+            for task in waiting:
+                task.cancel()
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_long_waits_time_out():
+    limiter = admission(room_rate=1, max_wait=0.01)
+
+    async def scenario():
+        await limiter.acquire("room")
+        with pytest.raises(AdmissionRejected):
+            await limiter.acquire("room")
+
+    asyncio.run(scenario())
+    assert limiter.stats["timed_out"] == 1
+
+
+def test_take_many_grants_hosts_first_without_waiting():
+    limiter = admission(room_rate=1, room_burst=3)
+
+    assert limiter.take_many("room", hosts=1, viewers=4) == (1, 2)
+    with pytest.raises(AdmissionRejected):
+        limiter.take_many("room", hosts=1, viewers=1)
+    assert limiter.stats["admitted"] == 3
+    assert limiter.stats["rejected"] == 4
+
+
+def test_take_many_does_not_overtake_queued_joins():
+    limiter = admission(room_rate=1000)
+
+    async def scenario():
+        await limiter.acquire("room")
+        waiting = asyncio.create_task(limiter.acquire("room"))
+        await asyncio.sleep(0)
+        # A token comes back before the drainer hands it to the queued viewer
+        time.sleep(0.005)
+        try:
+            with pytest.raises(AdmissionRejected):
+                limiter.take_many("room", hosts=0, viewers=1)
+            return limiter.take_many("room", hosts=1, viewers=0)
+        finally:
+            waiting.cancel()
+
+    assert asyncio.run(scenario()) == (1, 0)
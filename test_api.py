@@ -0,0 +1,174 @@
+"""
+API tests for the LiveKit Streaming Platform against the fake LiveKit server
+
+Each test starts fake_livekit.py on a background event loop and imports
+main afresh, once per state store backend (see conftest.py):
+    python -m pytest -q test_api.py
+"""
+import base64
+import hashlib
+import json
+import time
+
+from fastapi.testclient import TestClient
+from livekit import api
+from livekit.protocol import room as room_proto
+
+from conftest import API_KEY, API_SECRET
+
+
+def send_webhook(client: TestClient, event: dict, secret: str = API_SECRET):
+    """POST a webhook event signed the way LiveKit signs them"""
+    body = json.dumps(event)
+    digest = base64.b64encode(hashlib.sha256(body.encode()).digest()).decode()
+    token = api.AccessToken(API_KEY, secret).with_sha256(digest).to_jwt()
+    return client.post("/webhooks/livekit", content=body, headers={"Authorization": token})
+
+
+def join(client: TestClient, room_name: str, participant_name: str):
+    return client.post(f"/rooms/{room_name}/join", json={"participant_name": participant_name})
+
+
+def test_webhook_signature_is_checked(client):
+    client.post("/rooms/create", json={"name": "signed", "max_participants": 5})
+    event = {"event": "room_started", "room": {"name": "signed", "sid": "RM_signed"}}
+
+    assert send_webhook(client, event, secret="wrong-secret-wrong-secret-wrong-secret").status_code == 401
+    assert send_webhook(client, event).status_code == 200
+
+
+def test_join_stops_at_capacity(client):
+    assert client.post("/rooms/create", json={"name": "small", "max_participants": 2}).status_code == 200
+
+    assert join(client, "small", "alice").status_code == 200
+    assert join(client, "small", "bob").status_code == 200
+    full = join(client, "small", "carol")
+    assert full.status_code == 400
+    assert full.json()["detail"] == "Room is full"
+    # Joining again does not take another slot
+    assert join(client, "small", "alice").status_code == 200
+
+
+def test_participant_left_frees_a_slot(client):
+    client.post("/rooms/create", json={"name": "leave", "max_participants": 1})
+    assert join(client, "leave", "alice").status_code == 200
+    send_webhook(client, {
+        "event": "participant_joined",
+        "room": {"name": "leave"},
+        "participant": {"identity": "alice"},
+    })
+    assert join(client, "leave", "bob").status_code == 400
+
+    send_webhook(client, {
+        "event": "participant_left",
+        "room": {"name": "leave"},
+        "participant": {"identity": "alice"},
+    })
+    assert join(client, "leave", "bob").status_code == 200
+
+
+def test_reservation_survives_room_started(client):
+    client.post("/rooms/create", json={"name": "early", "max_participants": 1})
+    assert join(client, "early", "alice").status_code == 200
+
+    # LiveKit reports the room started after the join reserved its slot
+    assert send_webhook(client, {
+        "event": "room_started", "room": {"name": "early", "sid": "RM_early"}
+    }).status_code == 200
+    assert join(client, "early", "bob").status_code == 400
+
+
+def test_bulk_join_admits_up_to_capacity(client):
+    client.post("/rooms/create", json={"name": "bulk", "max_participants": 3})
+    assert join(client, "bulk", "alice").status_code == 200
+
+    response = client.post("/rooms/bulk/join:bulk", json={"participants": [
+        {"participant_name": name} for name in ("bob", "carol", "dave", "alice")
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    results = {p["participant_name"]: p["success"] for p in body["participants"]}
+    assert results == {"bob": True, "carol": True, "dave": False, "alice": True}
+    # One rejection means the bulk join as a whole did not succeed
+    assert body["success"] is False
+    assert body["admitted"] == 3
+
+
+def test_bulk_create_makes_a_repeated_name_once(client, livekit):
+    service, _ = livekit
+    response = client.post("/rooms/create:bulk", json={"rooms": [
+        {"name": "twice", "max_participants": 2},
+        {"name": "once", "max_participants": 5},
+        {"name": "twice", "max_participants": 9},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    assert body["created"] == 2
+    assert [result["name"] for result in body["results"]] == ["twice", "once"]
+    assert service.calls["CreateRoom"] == 2
+
+    # The first settings win
+    assert join(client, "twice", "alice").status_code == 200
+    assert join(client, "twice", "bob").status_code == 200
+    assert join(client, "twice", "carol").status_code == 400
+
+
+def test_room_list_etag_follows_changes(client):
+    client.post("/rooms/create", json={"name": "tagged", "max_participants": 5})
+    time.sleep(0.1)
+    first = client.get("/rooms")
+    assert first.status_code == 200
+
+    unchanged = client.get("/rooms", headers={"If-None-Match": first.headers["etag"]})
+    assert unchanged.status_code == 304
+
+    client.post("/rooms/create", json={"name": "another", "max_participants": 5})
+    time.sleep(0.1)
+    changed = client.get("/rooms", headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert {"tagged", "another"} <= {room["name"] for room in changed.json()}
+
+
+def test_kicked_participant_leaves_room_info(client, livekit):
+    service, _ = livekit
+    client.post("/rooms/create", json={"name": "kick", "max_participants": 5})
+    service.add_participant("kick", "alice")
+    send_webhook(client, {
+        "event": "participant_joined",
+        "room": {"name": "kick"},
+        "participant": {"identity": "alice"},
+    })
+    time.sleep(0.1)
+    before = client.get("/rooms/kick").json()
+    assert [p["identity"] for p in before["participants"]] == ["alice"]
+
+    assert client.post("/rooms/kick/participants/alice/kick").status_code == 200
+    after = client.get("/rooms/kick").json()
+    assert after["participants"] == []
+
+
+def test_hydration_changes_room_list_etag(client, livekit, main):
+    service, _ = livekit
+    deadline = time.monotonic() + 10
+    while main.room_hydrator.stats["phase"] != "done":
+        assert time.monotonic() < deadline, "Hydration did not finish"
+        time.sleep(0.05)
+
+    # A room LiveKit has but the state store lacks, as after a restart
+    service.create_room(room_proto.CreateRoomRequest(name="restored", metadata=json.dumps({
+        "max_participants": 7, "created_at": "2020-01-01T00:00:00",
+    })))
+    time.sleep(0.1)
+    before = client.get("/rooms")
+    assert before.status_code == 200
+
+    # The join restores the room's config on demand
+    assert join(client, "restored", "alice").status_code == 200
+    time.sleep(0.1)
+
+    after = client.get("/rooms", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    room = next(room for room in after.json() if room["name"] == "restored")
+    assert room["max_participants"] == 7
+    assert room["creation_time"] == "2020-01-01T00:00:00"
@@ -0,0 +1,31 @@
+"""
+Tests for data-channel packet framing
+"""
+import json
+
+import pytest
+
+from data_channel import CODEC_JSON, MAGIC, decode_packet, default_codec, encode_packet
+
+MESSAGES = [{"type": "chat", "text": "hi"}, [1, 2, 3], "plain", None]
+
+
+@pytest.mark.parametrize("codec", sorted({CODEC_JSON, default_codec()}))
+def test_packets_round_trip(codec):
+    assert decode_packet(encode_packet(MESSAGES, codec)) == MESSAGES
+    assert decode_packet(encode_packet([], codec)) == []
+
+
+def test_plain_json_is_one_message():
+    assert decode_packet(json.dumps({"type": "chat"}).encode()) == [{"type": "chat"}]
+
+
+@pytest.mark.parametrize("packet", [
+    MAGIC,
+    MAGIC + bytes((CODEC_JSON,)) + b"\x00\x00",
+    MAGIC + b"\x07" + b"\x00\x00\x00\x02{}",
+    MAGIC + bytes((CODEC_JSON,)) + b"\x00\x00\x00\x09{}",
+], ids=["magic-only", "truncated-length", "unknown-codec", "truncated-payload"])
+def test_malformed_packets_raise_value_error(packet):
+    with pytest.raises(ValueError):
+        decode_packet(packet)
@@ -0,0 +1,59 @@
+"""
+Tests for rebuilding room state from LiveKit after a restart
+"""
+import asyncio
+import json
+
+from livekit.protocol.models import ParticipantInfo, Room
+
+from hydration import RoomHydrator, room_config_from_metadata
+from state_store import MemoryStateStore
+
+
+def test_config_comes_from_creation_metadata():
+    room = Room(name="a", sid="RM_a", metadata=json.dumps({
+        "max_participants": 7, "created_at": "2020-01-01T00:00:00", "node": "eu",
+    }))
+    config = room_config_from_metadata(room)
+    assert config["max_participants"] == 7
+    assert config["created_at"] == "2020-01-01T00:00:00"
+    assert config["node"] == "eu"
+
+    assert room_config_from_metadata(Room(name="b", metadata="not json"))["max_participants"] == 100
+
+
+def test_hot_rooms_are_restored_before_ready():
+    busy = Room(name="busy", num_participants=2, metadata=json.dumps({"max_participants": 2}))
+    rooms = [Room(name="idle"), busy, Room(name="stored")]
+    participants = {"busy": [ParticipantInfo(identity="alice"), ParticipantInfo(identity="bob")]}
+    store = MemoryStateStore()
+    restored = []
+
+    async def load_rooms():
+        return rooms
+
+    async def get_room(name):
+        return next((room for room in rooms if room.name == name), None)
+
+    async def fetch_participants(name):
+        return participants.get(name, [])
+
+    async def scenario():
+        await store.put_room("stored", {"max_participants": 1})
+        hydrator = RoomHydrator(store, load_rooms, get_room, fetch_participants,
+                                on_restored=restored.append)
+
+        async def rooms_when_ready():
+            await hydrator.ready.wait()
+            return sorted(await store.list_rooms())
+
+        hot, _ = await asyncio.gather(rooms_when_ready(), hydrator.run())
+        return hydrator.stats, hot, await store.admit_many("busy", ["alice", "carol"])
+
+    stats, hot, admitted = asyncio.run(scenario())
+    assert hot == ["busy", "stored"]
+    assert restored == ["busy", "idle"]
+    assert stats["phase"] == "done"
+    assert (stats["hot_rooms"], stats["already_present"], stats["hydrated"]) == (1, 1, 2)
+    # Restored participants hold their slots
+    assert admitted == [True, False]
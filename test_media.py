@@ -0,0 +1,41 @@
+"""
+Tests for media conversion helpers
+"""
+import numpy as np
+import pytest
+
+from media import AudioConverter, array_chunks
+
+
+def tone(rate: int, seconds: float, channels: int = 1) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    samples = (np.sin(2 * np.pi * 440 * t) * 10000).astype(np.int16)
+    return np.repeat(samples[:, None], channels, axis=1)
+
+
+@pytest.mark.parametrize("in_rate,out_rate", [(48000, 16000), (44100, 48000), (16000, 48000)])
+@pytest.mark.parametrize("chunk", [1, 441, 1000])
+def test_chunked_resampling_matches_one_shot(in_rate, out_rate, chunk):
+    samples = tone(in_rate, 0.25)
+    whole = AudioConverter(in_rate, 1, out_rate, 1).process(samples)
+
+    converter = AudioConverter(in_rate, 1, out_rate, 1)
+    chunked = np.concatenate([converter.process(part) for part in array_chunks(samples, chunk)])
+
+    # Output after the last input sample waits for the next chunk
+    assert 0 <= len(samples) * out_rate / in_rate - len(whole) < max(1, out_rate / in_rate) + 1
+    assert len(chunked) == len(whole)
+    assert np.abs(chunked.astype(np.int32) - whole).max() <= 1
+
+
+def test_channels_are_remixed():
+    stereo = np.array([[1000, 3000], [-2000, 0]], dtype=np.int16)
+    assert AudioConverter(48000, 2, 48000, 1).process(stereo).tolist() == [[2000], [-1000]]
+
+    mono = np.array([5, -7], dtype=np.int16)
+    assert AudioConverter(48000, 1, 48000, 2).process(mono).tolist() == [[5, 5], [-7, -7]]
+
+
+def test_matching_formats_pass_through():
+    samples = tone(48000, 0.01, channels=2)
+    assert AudioConverter(48000, 2, 48000, 2).process(samples) is samples
@@ -0,0 +1,115 @@
+"""
+Tests for placing rooms across several LiveKit nodes
+"""
+import asyncio
+from typing import Dict, Optional
+
+import pytest
+from livekit.protocol import room as room_proto
+from livekit.protocol.models import Room
+
+from nodes import PLACEMENT_LEAST_LOAD, LiveKitNode, NodeRouter
+from resilience import PartialListing
+from room_cache import RoomSnapshotCache
+
+
+class Service:
+    """RoomService of one node, kept in memory"""
+
+    def __init__(self):
+        self.rooms: Dict[str, Room] = {}
+        self.error: Optional[Exception] = None
+        self.listings = 0
+
+    async def list_rooms(self, request: room_proto.ListRoomsRequest):
+        self.listings += 1
+        if self.error is not None:
+            raise self.error
+        names = request.names or list(self.rooms)
+        return room_proto.ListRoomsResponse(rooms=[self.rooms[n] for n in names if n in self.rooms])
+
+    async def create_room(self, request: room_proto.CreateRoomRequest):
+        return self.rooms.setdefault(request.name, Room(name=request.name, sid=f"RM_{request.name}"))
+
+
+def make_router(count: int = 3, **kwargs) -> NodeRouter:
+    nodes = []
+    for i in range(count):
+        node = LiveKitNode(f"node-{i}", f"http://node-{i}", "key", "secret")
+        node.room_service = Service()
+        nodes.append(node)
+    return NodeRouter(nodes, **kwargs)
+
+
+def create(router: NodeRouter, name: str) -> str:
+    asyncio.run(router.create_room(room_proto.CreateRoomRequest(name=name)))
+    return next(node.name for node in router.nodes.values() if name in node.room_service.rooms)
+
+
+def test_hash_placement_is_stable():
+    names = [f"room-{i}" for i in range(50)]
+    first = {name: make_router().place(name).name for name in names}
+    assert first == {name: make_router().place(name).name for name in names}
+    assert len(set(first.values())) == 3
+
+
+def test_least_load_spreads_new_rooms():
+    router = make_router(placement=PLACEMENT_LEAST_LOAD)
+    placed = [create(router, f"room-{i}") for i in range(6)]
+    assert sorted(placed) == ["node-0", "node-0", "node-1", "node-1", "node-2", "node-2"]
+    assert {stats["rooms"] for stats in router.stats.values()} == {2}
+
+
+def test_locate_uses_the_stored_node_then_searches():
+    router = make_router()
+    stored = {"elsewhere": "node-2"}
+
+    async def resolve(name):
+        return stored.get(name)
+
+    router.resolve = resolve
+    router.nodes["node-1"].room_service.rooms["found"] = Room(name="found")
+
+    async def scenario():
+        return (await router.locate("elsewhere")).name, (await router.locate("found")).name
+
+    assert asyncio.run(scenario()) == ("node-2", "node-1")
+    # The search asked every node, the stored location asked none
+    assert [node.room_service.listings for node in router.nodes.values()] == [1, 1, 1]
+
+
+def test_listing_with_a_failed_node_is_partial():
+    router = make_router()
+    for name in ("a", "b", "c", "d", "e", "f"):
+        create(router, name)
+    down = router.nodes["node-0"]
+    on_down = set(down.room_service.rooms)
+    assert on_down, "expected some rooms on node-0"
+
+    async def fetch(names=None):
+        response = await router.list_rooms(room_proto.ListRoomsRequest(names=names))
+        return list(response.rooms)
+
+    cache = RoomSnapshotCache(fetch, ttl=0, refresh_interval=0, max_stale=60)
+    asyncio.run(cache.refresh())
+    down.room_service.error = OSError("node down")
+
+    with pytest.raises(PartialListing) as partial:
+        asyncio.run(router.list_rooms(room_proto.ListRoomsRequest()))
+    assert {room.name for room in partial.value.rooms} == set("abcdef") - on_down
+    assert all(partial.value.unlisted(name) for name in on_down)
+    assert router.stale_nodes == {"node-0"}
+
+    # The snapshot keeps the down node's rooms and says it is stale
+    rooms = asyncio.run(cache.rooms_after())
+    assert {room.name for room in rooms} == set("abcdef")
+    assert cache.refresh_failed
+    assert cache.staleness is not None
+
+
+def test_listing_fails_when_every_node_fails():
+    router = make_router(count=2)
+    for node in router.nodes.values():
+        node.room_service.error = OSError("node down")
+    with pytest.raises(OSError):
+        asyncio.run(router.list_rooms(room_proto.ListRoomsRequest()))
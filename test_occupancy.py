@@ -0,0 +1,71 @@
+"""
+Tests for room occupancy history
+"""
+import numpy as np
+import pytest
+from livekit.protocol.models import Room
+
+from occupancy import OccupancyStore, parse_tiers
+
+TIERS = parse_tiers("10:12,60:4")
+
+
+def room(name: str, participants: int, publishers: int = 0) -> Room:
+    return Room(name=name, num_participants=participants, num_publishers=publishers)
+
+
+def test_tiers_must_build_on_each_other():
+    assert TIERS == [(10, 12), (60, 4)]
+    with pytest.raises(ValueError):
+        OccupancyStore([(10, 12), (45, 4)])
+    with pytest.raises(ValueError):
+        OccupancyStore([(10, 3), (60, 4)])
+
+
+def test_stats_summarize_the_window():
+    store = OccupancyStore(TIERS)
+    for i in range(10):
+        store.record([room("a", i + 1, publishers=i % 2)], now=i * 10)
+
+    stats = store.stats("a", window=100, now=95, include_series=True)
+    assert (stats["resolution_seconds"], stats["samples"]) == (10, 10)
+    participants = stats["participants"]
+    assert (participants["current"], participants["peak"], participants["average"]) == (10, 10, 5.5)
+    assert participants["p50"] == 5.5
+    assert participants["p90"] == pytest.approx(np.percentile(np.arange(1, 11), 90))
+    assert stats["publishers"] == {"current": 1, "peak": 1, "average": 0.5}
+    assert stats["series"]["timestamps"] == list(range(0, 100, 10))
+
+    # Only the last three samples fall in a 30 second window
+    assert store.stats("a", window=30, now=95)["participants"]["average"] == 9
+
+
+def test_coarse_tier_holds_averages_and_peaks():
+    store = OccupancyStore(TIERS)
+    for i, count in enumerate([1, 2, 9, 4, 5, 3]):
+        store.record([room("a", count)], now=i * 10)
+    # The first sample of the next minute completes the coarse bucket
+    store.record([room("a", 0)], now=60)
+
+    stats = store.stats("a", window=240, now=60, include_series=True)
+    assert stats["resolution_seconds"] == 60
+    assert stats["series"]["timestamps"] == [0]
+    assert stats["series"]["participants"] == [4.0]
+    assert stats["series"]["peak"] == [9.0]
+
+
+def test_ended_rooms_are_forgotten_and_rows_reused():
+    store = OccupancyStore(TIERS, initial_rows=2)
+    store.record([room("a", 1), room("b", 7)], now=0)
+    store.record([room("a", 2), room("c", 3)], now=10)
+
+    assert store.room_count == 2
+    assert store.stats("b", window=100, now=10) is None
+    # c took over b's row without inheriting its samples
+    assert store.stats("c", window=100, now=10)["samples"] == 1
+
+    size = store.nbytes
+    store.record([room("a", 1), room("c", 1), room("d", 1)], now=20)
+    assert store.room_count == 3
+    assert store.nbytes > size
+    assert store.stats("a", window=100, now=20)["samples"] == 3
@@ -0,0 +1,105 @@
+"""
+Tests for LiveKit call deadlines, retries and circuit breaking
+"""
+import asyncio
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, ResilientProxy, UpstreamTimeout
+
+
+class Flaky:
+    """RoomService stand-in whose calls fail with OSError and count attempts"""
+
+    def __init__(self):
+        self.calls = {}
+
+    async def _fail(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        raise OSError("connection refused")
+
+    async def list_rooms(self):
+        await self._fail("list_rooms")
+
+    async def create_room(self):
+        await self._fail("create_room")
+
+    async def get_participant(self):
+        self.calls["get_participant"] = self.calls.get("get_participant", 0) + 1
+        raise LookupError("participant not found")
+
+
+def test_breaker_opens_after_the_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert 0 < breaker.retry_after <= 60
+
+
+def test_only_idempotent_calls_are_retried():
+    target = Flaky()
+    proxy = ResilientProxy(target, CircuitBreaker(failure_threshold=100), retries=2, backoff=0)
+
+    async def scenario():
+        for call in (proxy.list_rooms, proxy.create_room, proxy.get_participant):
+            with pytest.raises(Exception):
+                await call()
+
+    asyncio.run(scenario())
+    assert target.calls == {"list_rooms": 3, "create_room": 1, "get_participant": 1}
+    assert proxy.retry_count == 2
+    # A client error is LiveKit answering, so it resets the failure streak
+    assert proxy.breaker.failures == 0
+
+
+def test_open_breaker_short_circuits_calls():
+    target = Flaky()
+    proxy = ResilientProxy(target, CircuitBreaker(failure_threshold=1, reset_timeout=60), retries=2)
+
+    async def scenario():
+        # The retry finds the breaker open and gives up without calling LiveKit
+        with pytest.raises(CircuitOpenError):
+            await proxy.list_rooms()
+        with pytest.raises(CircuitOpenError):
+            await proxy.create_room()
+
+    asyncio.run(scenario())
+    assert target.calls == {"list_rooms": 1}
+
+
+def test_slow_calls_miss_their_deadline():
+    class Slow:
+        async def list_rooms(self):
+            await asyncio.sleep(1)
+
+    proxy = ResilientProxy(Slow(), CircuitBreaker(), timeout=0.01, retries=0)
+    with pytest.raises(UpstreamTimeout):
+        asyncio.run(proxy.list_rooms())
+
+
+def test_cancelled_probe_frees_breaker():
+    class Hanging:
+        async def list_rooms(self):
+            await asyncio.sleep(10)
+
+    async def scenario():
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        await asyncio.sleep(0.02)
+        proxy = ResilientProxy(Hanging(), breaker, timeout=5)
+
+        probe = asyncio.create_task(proxy.list_rooms())
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
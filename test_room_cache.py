@@ -0,0 +1,125 @@
+"""
+Tests for the shared room snapshot cache
+"""
+import asyncio
+from typing import List, Optional
+
+from livekit.protocol.models import ParticipantInfo, Room
+
+from room_cache import RoomSnapshotCache
+
+
+class Upstream:
+    """Room fetcher that records its calls and can be made to fail"""
+
+    def __init__(self, *names: str, delay: float = 0.0):
+        self.rooms = {name: Room(name=name, sid=f"RM_{name}") for name in names}
+        self.delay = delay
+        self.calls: List[Optional[List[str]]] = []
+        self.error: Optional[Exception] = None
+
+    async def __call__(self, names: Optional[List[str]] = None) -> List[Room]:
+        self.calls.append(names)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [room for name, room in self.rooms.items() if not names or name in names]
+
+
+def test_concurrent_reads_share_one_fetch():
+    upstream = Upstream("a", "b", delay=0.01)
+    cache = RoomSnapshotCache(upstream, ttl=60, refresh_interval=0)
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.rooms_after() for _ in range(20)))
+        return [[room.name for room in rooms] for rooms in results]
+
+    assert asyncio.run(scenario()) == [["a", "b"]] * 20
+    assert upstream.calls == [None]
+
+
+def test_fresh_snapshot_answers_lookups_without_upstream_calls():
+    upstream = Upstream("a")
+    cache = RoomSnapshotCache(upstream, ttl=60, refresh_interval=0)
+
+    async def scenario():
+        await cache.refresh()
+        return await cache.get_room("a"), await cache.get_room("missing")
+
+    found, missing = asyncio.run(scenario())
+    assert found.name == "a"
+    assert missing is None
+    assert upstream.calls == [None]
+
+
+def test_lookup_asks_for_a_room_missing_from_a_fresh_snapshot():
+    upstream = Upstream("a")
+    cache = RoomSnapshotCache(upstream, ttl=60, refresh_interval=0)
+
+    async def scenario():
+        await cache.refresh()
+        upstream.rooms["late"] = Room(name="late")
+        return await cache.get_room("late", lookup=True)
+
+    assert asyncio.run(scenario()).name == "late"
+    assert upstream.calls == [None, ["late"]]
+    assert cache.peek_room("late") is not None
+
+
+def test_stale_lookups_fetch_only_the_named_rooms():
+    upstream = Upstream("a", "b", "c")
+    cache = RoomSnapshotCache(upstream, ttl=0, refresh_interval=0)
+
+    rooms = asyncio.run(cache.get_rooms(["a", "c", "gone"]))
+    assert sorted(rooms) == ["a", "c"]
+    assert upstream.calls == [["a", "c", "gone"]]
+
+
+def test_versions_change_only_with_the_room():
+    cache = RoomSnapshotCache(Upstream(), ttl=60, refresh_interval=0)
+    cache.update_room(Room(name="a", num_participants=1))
+    first = cache.room_version("a")
+
+    cache.update_room(Room(name="a", num_participants=1))
+    assert cache.room_version("a") == first
+
+    cache.update_room(Room(name="a", num_participants=2))
+    changed = cache.room_version("a")
+    assert changed > first
+
+    cache.touch("a")
+    assert cache.room_version("a") > changed
+
+    cache.remove_room("a")
+    assert cache.room_version("a") is None
+
+
+def test_participant_tracking_follows_events_and_counts():
+    upstream = Upstream("a")
+    cache = RoomSnapshotCache(upstream, ttl=0, refresh_interval=0)
+    asyncio.run(cache.refresh())
+    cache.set_participants("a", [])
+
+    cache.update_participant("a", ParticipantInfo(identity="alice"))
+    assert [p.identity for p in cache.participants("a")] == ["alice"]
+    assert cache.peek_room("a").num_participants == 1
+
+    # A refresh that disagrees with the tracked list stops trusting it
+    asyncio.run(cache.refresh())
+    assert cache.participants("a") is None
+
+
+def test_failing_refresh_serves_the_last_snapshot_as_stale():
+    upstream = Upstream("a")
+    cache = RoomSnapshotCache(upstream, ttl=0, refresh_interval=0, max_stale=60)
+
+    async def scenario():
+        await cache.refresh()
+        upstream.error = OSError("LiveKit down")
+        return [room.name for room in await cache.rooms_after()], await cache.get_room("a")
+
+    names, room = asyncio.run(scenario())
+    assert names == ["a"]
+    assert room.name == "a"
+    assert cache.refresh_failed
+    assert cache.staleness is not None
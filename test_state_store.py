@@ -0,0 +1,106 @@
+"""
+Tests for the room and participant state stores
+"""
+import asyncio
+
+import pytest
+
+from state_store import CachedStateStore, MemoryStateStore, SQLiteStateStore
+
+CONFIG = {"max_participants": 2, "created_at": "2020-01-01T00:00:00"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    """Factory for an empty store of either backend"""
+    def make(reservation_ttl: float = 0.0):
+        if request.param == "memory":
+            return MemoryStateStore(reservation_ttl=reservation_ttl)
+        return SQLiteStateStore(str(tmp_path / "state.db"), reservation_ttl=reservation_ttl)
+    return make
+
+
+def test_cached_store_does_not_cache_missing_rooms(tmp_path):
+    path = str(tmp_path / "state.db")
+    reader = CachedStateStore(SQLiteStateStore(path), ttl=60)
+    writer = SQLiteStateStore(path)
+
+    async def scenario():
+        assert await reader.get_room("late") is None
+        assert await reader.get_rooms(["late"]) == {}
+        await writer.put_room("late", CONFIG)
+        return await reader.get_room("late"), await reader.get_rooms(["late"])
+
+    room, rooms = asyncio.run(scenario())
+    assert room == CONFIG
+    assert rooms == {"late": CONFIG}
+
+
+def test_sqlite_stores_on_one_file_share_rooms_and_capacity(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = SQLiteStateStore(path), SQLiteStateStore(path)
+    assert first.shared and CachedStateStore(second).shared
+    assert not MemoryStateStore().shared
+
+    async def scenario():
+        await first.put_room("shared", CONFIG)
+        assert await second.get_room("shared") == CONFIG
+        assert await first.admit_many("shared", ["alice", "bob"]) == [True, True]
+        return await second.admit("shared", "carol")
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_admission_stops_at_capacity_and_repeats_are_free(make_store):
+    store = make_store()
+
+    async def scenario():
+        await store.put_room("room", CONFIG)
+        first = await store.admit_many("room", ["alice", "bob", "carol", "alice"])
+        again = await store.admit("room", "bob")
+        missing = await store.admit_many("missing", ["alice"])
+        return first, again, missing
+
+    assert asyncio.run(scenario()) == ([True, True, False, True], True, [False])
+
+
+def test_unused_reservations_expire_but_joins_do_not(make_store):
+    store = make_store(reservation_ttl=0.05)
+
+    async def scenario():
+        await store.put_room("room", CONFIG)
+        assert await store.admit_many("room", ["alice", "bob"]) == [True, True]
+        await store.add_participant("room", "alice")
+        assert not await store.admit("room", "carol")
+        await asyncio.sleep(0.1)
+        # bob's token went unused; alice has joined and keeps the slot
+        return await store.admit_many("room", ["carol", "dave"])
+
+    assert asyncio.run(scenario()) == [True, False]
+
+
+def test_restore_keeps_joins_reported_meanwhile(make_store):
+    store = make_store()
+
+    async def scenario():
+        # A webhook join for a room the store does not have yet
+        await store.add_participant("room", "alice")
+        config = await store.restore_room("room", CONFIG, ["bob"])
+        return config, await store.admit("room", "carol")
+
+    config, admitted = asyncio.run(scenario())
+    assert config == CONFIG
+    assert admitted is False
+
+
+def test_restore_leaves_a_stored_room_alone(make_store):
+    store = make_store()
+
+    async def scenario():
+        await store.put_room("room", CONFIG)
+        stored = await store.restore_room("room", dict(CONFIG, max_participants=50), ["alice", "bob"])
+        return stored, await store.admit("room", "carol")
+
+    stored, admitted = asyncio.run(scenario())
+    assert stored == CONFIG
+    assert admitted is True
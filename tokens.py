@@ -0,0 +1,138 @@
+"""
+Access token minting for the LiveKit Streaming Platform
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from livekit import api
+
+# (identity, display name, grants) for one token
+TokenSpec = Tuple[str, str, api.VideoGrants]
+# (API key, API secret) of the LiveKit deployment a token is for
+Credentials = Tuple[str, str]
+
+
+def sign_token(api_key: str, api_secret: str, identity: str, name: str,
+               grants: api.VideoGrants) -> str:
+    """Sign a single participant access token"""
+    token = api.AccessToken(api_key, api_secret)
+    token.with_identity(identity)
+    token.with_name(name)
+    token.with_grants(grants)
+    return token.to_jwt()
+
+
+def sign_tokens(api_key: str, api_secret: str, specs: List[TokenSpec]) -> List[str]:
+    """Sign a chunk of tokens, run inside the worker pool"""
+    return [sign_token(api_key, api_secret, *spec) for spec in specs]
+
+
+class TokenMinter:
+    """Signs access tokens, reusing recently signed ones for identical requests.
+
+    Batches at or above ``pool_threshold`` are signed in a process pool so a
+    join storm does not hold the event loop for the whole batch. Tokens are
+    signed with the default credentials unless others are passed in.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, cache_ttl: float = 30.0,
+                 cache_size: int = 10000, pool_threshold: int = 64,
+                 pool_workers: Optional[int] = None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.pool_threshold = pool_threshold
+        self.pool_workers = pool_workers
+
+        self._cache: "OrderedDict[Tuple[str, str, str, str, str], Tuple[float, str]]" = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _credentials(self, credentials: Optional[Credentials]) -> Credentials:
+        return credentials or (self.api_key, self.api_secret)
+
+    def _key(self, api_key: str, identity: str, name: str, grants: api.VideoGrants):
+        return (api_key, grants.room, identity, name, repr(grants))
+
+    def _cached(self, key) -> Optional[str]:
+        if self.cache_ttl <= 0:
+            return None
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, jwt_token = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return jwt_token
+
+    def _store(self, key, jwt_token: str):
+        if self.cache_ttl <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl, jwt_token)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def mint(self, identity: str, name: str, grants: api.VideoGrants,
+             credentials: Optional[Credentials] = None) -> str:
+        """Return a signed token, from the cache when an identical one is fresh"""
+        api_key, api_secret = self._credentials(credentials)
+        key = self._key(api_key, identity, name, grants)
+        jwt_token = self._cached(key)
+        if jwt_token is None:
+            jwt_token = sign_token(api_key, api_secret, identity, name, grants)
+            self._store(key, jwt_token)
+        return jwt_token
+
+    async def mint_many(self, specs: List[TokenSpec],
+                        credentials: Optional[Credentials] = None) -> List[str]:
+        """Return signed tokens for a batch, in the order given"""
+        api_key, api_secret = self._credentials(credentials)
+        tokens: List[Optional[str]] = []
+        misses = []
+        for index, spec in enumerate(specs):
+            jwt_token = self._cached(self._key(api_key, *spec))
+            tokens.append(jwt_token)
+            if jwt_token is None:
+                misses.append(index)
+
+        if len(misses) < self.pool_threshold:
+            signed = [sign_token(api_key, api_secret, *specs[i]) for i in misses]
+        else:
+            signed = await self._sign_in_pool(api_key, api_secret, [specs[i] for i in misses])
+
+        for index, jwt_token in zip(misses, signed):
+            tokens[index] = jwt_token
+            self._store(self._key(api_key, *specs[index]), jwt_token)
+        return tokens
+
+    async def _sign_in_pool(self, api_key: str, api_secret: str, specs: List[TokenSpec]) -> List[str]:
+        workers = self.pool_workers or os.cpu_count() or 1
+        if self._pool is None:
+            # Spawned workers avoid forking a process that runs an event loop
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        chunk_size = max(1, -(-len(specs) // workers))
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(self._pool, sign_tokens, api_key, api_secret,
+                                 specs[i:i + chunk_size])
+            for i in range(0, len(specs), chunk_size)
+        ))
+        return [jwt_token for chunk in chunks for jwt_token in chunk]
+
+    def close(self):
+        """Shut down the signing pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None